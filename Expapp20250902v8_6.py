@@ -1,107 +1,105 @@
 import streamlit as st 
-import pandas as pd
 from datetime import datetime
+from contextlib import contextmanager
 import os
-
-LOG_FILE = "log.csv"
-
-# Initialize log file
-def init_log():
-    if not os.path.exists(LOG_FILE):
-        df = pd.DataFrame(columns=[
-            "DateTime", "Shop", "Item", "Qty",
-            "NormalPrice", "PurchasePrice",
-            "DiscountAmt", "DiscountPct",
-            "TotalNormal", "TotalPurchase", "TotalDiscount"
-        ])
-        df.to_csv(LOG_FILE, index=False)
-
-# Load log
-def load_log():
-    return pd.read_csv(LOG_FILE) if os.path.exists(LOG_FILE) else pd.DataFrame(columns=[
-        "DateTime", "Shop", "Item", "Qty",
-        "NormalPrice", "PurchasePrice",
-        "DiscountAmt", "DiscountPct",
-        "TotalNormal", "TotalPurchase", "TotalDiscount"
-    ])
-
-# Save log
-def save_log(df):
-    df.to_csv(LOG_FILE, index=False)
-
-# Utility conversions
-def to_float(val, allow_zero=False):
-    try:
-        val = float(val)
-        if allow_zero:
-            return val if val >= 0 else None
-        else:
-            return val if val > 0 else None
-    except:
+from exp_core import LOG_FILE, MAX_DATE, MIN_DATE, check_amounts, make_entry
+from exp_store import LogStore
+from exp_timeindex import PERIODS, period_bounds
+from exp_downsample import bucket, price_series
+from exp_basket import basket_entries, basket_rows, baskets, blank_lines, new_basket_id
+from exp_budget import BUDGET_KINDS, budget_status, budget_warnings, load_budgets, save_budgets, set_budget
+from exp_prices import audit_prices
+from exp_rolling import ALL_SHOPS, METRICS, WINDOWS
+from exp_metrics import RunMetrics, file_size, load_metrics
+from exp_sql import DEFAULT_SQL, available as sql_available
+from exp_alias import ALIAS_KINDS, load_aliases, save_aliases, add_alias, canonical_name
+
+MAX_SUGGESTIONS = 20
+MAX_SQL_ROWS = 5000
+APP_NAME = os.path.basename(__file__)
+
+# Record this run's metrics before restarting the script
+def rerun():
+    metrics.write()
+    st.rerun()
+
+# Time a page section. On a full run it goes into the page's record; when a
+# fragment reruns on its own the page record is already written, so the
+# fragment gets a record of its own.
+@contextmanager
+def section(name):
+    global metrics
+    own_record = metrics.written
+    if own_record:
+        metrics = RunMetrics(f"{APP_NAME}#{name}")
+    with metrics.timer(name):
+        yield
+    if own_record:
+        metrics.write()
+
+# One log store per process, shared by every session
+@st.cache_resource
+def get_store():
+    return LogStore(LOG_FILE)
+
+# Short locked read of the shared model: sections take what they need inside
+# (shallow frame copies, lists, computed frames) and render outside, so a slow
+# render or query never holds up writers
+@contextmanager
+def read_model():
+    store = get_store()
+    with store.lock:
+        with metrics.timer("refresh"):
+            if store.refresh():
+                metrics.count("bytes_read", file_size(LOG_FILE), add=True)
+        metrics.count("rows", len(store.model.df))
+        yield store.model
+
+# Run a store mutation (it persists and notifies other sessions)
+def commit(action, *args):
+    store = get_store()
+    with metrics.timer("save"):
+        result, written = getattr(store, action)(*args)
+    metrics.count("bytes_written", written, add=True)
+    st.session_state.seen_version = store.version
+    return result
+
+# Last paid / best price hint for an item
+def price_hint(price_index, item):
+    last = price_index.last(item)
+    if last is None:
         return None
-
-def round_or_none(val):
-    return round(val, 2) if val is not None else None
-
-# Fallback field calculations
-def calculate_missing_fields(norm, purc, disc_pct, disc_amt):
-    norm = to_float(norm)
-    purc = to_float(purc)
-    disc_pct = to_float(disc_pct, allow_zero=True)
-    disc_amt = to_float(disc_amt, allow_zero=True)
-
-    # Treat 0 discounts as None (meaning not provided, so calculate if needed)
-    if disc_pct == 0:
-        disc_pct = None
-    if disc_amt == 0:
-        disc_amt = None
-
-    if purc is None and norm is not None and disc_amt is not None:
-        purc = norm - disc_amt
-    if purc is None and norm is not None and disc_pct is not None:
-        purc = norm * (1 - disc_pct / 100)
-    if norm is None and purc is not None and disc_amt is not None:
-        norm = purc + disc_amt
-    if norm is None and purc is not None and disc_pct is not None:
-        norm = purc / (1 - disc_pct / 100) if disc_pct < 100 else None
-
-    # Handle cases where only one price is provided without discounts
-    if norm is None and purc is not None and disc_amt is None and disc_pct is None:
-        norm = purc
-    elif purc is None and norm is not None and disc_amt is None and disc_pct is None:
-        purc = norm
-
-    if disc_amt is None:
-        if norm is not None and purc is not None:
-            disc_amt = norm - purc
-        elif norm is not None and disc_pct is not None:
-            disc_amt = norm * (disc_pct / 100)
-    if disc_pct is None and norm is not None and disc_amt is not None:
-        disc_pct = (disc_amt / norm) * 100 if norm > 0 else 0
-
-    return round_or_none(norm), round_or_none(purc), round_or_none(disc_pct), round_or_none(disc_amt)
-
-# Label for dropdown selection
-def get_index_label(row):
-    return f"{row['DateTime']} - {row['Shop']} - {row['Item']} (x{row['Qty']})"
-
-# App Start
-init_log()
-log_df = load_log()
-shops = sorted(log_df["Shop"].dropna().unique().tolist())
-items = sorted(log_df["Item"].dropna().unique().tolist())
-
-st.title("📋 Expenditure Tracker")
+    best = price_index.best(item)
+    return (
+        f"💡 Last paid {last.PurchasePrice:.2f} at {last.Shop} ({last.DateTime[:10]}) · "
+        f"Best {best.PurchasePrice:.2f} at {best.Shop} ({best.DateTime[:10]})"
+    )
+
+# Warn about budget envelopes an entry or receipt would overrun
+def warn_budgets(over):
+    for envelope in over:
+        st.warning(
+            f"💰 This takes the {envelope['kind'].lower()} budget for '{envelope['name']}' "
+            f"to {envelope['after']:.2f} of {envelope['monthly']:.2f} this month."
+        )
 
 # --- Edit Log Section ---
-st.subheader("✏️ Edit Log Entries")
-if not log_df.empty:
-    log_df["label"] = log_df.apply(get_index_label, axis=1)
-    selected = st.selectbox("Select entry to edit", [""] + log_df["label"].tolist())
-
-    if selected:
-        idx = log_df[log_df["label"] == selected].index[0]
-        selected_row = log_df.loc[idx]
+@st.fragment
+def edit_section():
+    with section("edit_form"):
+        st.subheader("✏️ Edit Log Entries")
+        with read_model() as model:
+            log_df = model.df.copy(deep=False)
+            labels = model.labels.copy(deep=False)
+        if log_df.empty:
+            st.info("Log is empty. No entries to edit.")
+            return
+        selected = st.selectbox("Select entry to edit", [""] + labels.tolist())
+        if not selected:
+            return
+
+        idx = labels.index[labels == selected][0]
+        selected_row = log_df.loc[idx].copy()
 
         with st.form("edit_entry"):
             st.write("Edit the selected entry:")
@@ -115,146 +113,449 @@ if not log_df.empty:
 
             update_btn = st.form_submit_button("💾 Save Changes")
             if update_btn:
-                norm, purc, disc_pct, disc_amt = calculate_missing_fields(norm, purc, disc_pct, disc_amt)
-                log_df.loc[idx] = {
-                    "DateTime": selected_row["DateTime"],
-                    "Shop": shop_name,
-                    "Item": item_name,
-                    "Qty": qty,
-                    "NormalPrice": norm,
-                    "PurchasePrice": purc,
-                    "DiscountAmt": disc_amt,
-                    "DiscountPct": disc_pct,
-                    "TotalNormal": round_or_none(norm * qty),
-                    "TotalPurchase": round_or_none(purc * qty),
-                    "TotalDiscount": round_or_none(disc_amt * qty)
-                }
-                save_log(log_df.drop(columns=["label"], errors="ignore"))
+                aliases = load_aliases()
+                shop_name = canonical_name(aliases, "Shop", shop_name)
+                item_name = canonical_name(aliases, "Item", item_name)
+                entry = make_entry(
+                    selected_row["DateTime"], shop_name, item_name, qty, norm, purc, disc_pct, disc_amt,
+                    basket_id=selected_row["BasketID"],
+                )
+                try:
+                    check_amounts(entry)
+                except ValueError as e:
+                    st.error(str(e))
+                    return
+                commit("update", idx, entry)
                 st.success("✅ Entry updated.")
-                st.rerun()
-else:
-    st.info("Log is empty. No entries to edit.")
+                rerun()
 
 # --- New Entry Section ---
-st.subheader("🆕 New Entry")
-with st.form("new_entry_form"):
-    col1, col2 = st.columns(2)
-
-    with col1:
-        shop_select = st.selectbox("Select Existing Shop", [""] + shops)
-    with col2:
-        shop = st.text_input("Shop Name (new or existing)", value=shop_select or "")
-
-    with col1:
-        item_select = st.selectbox("Select Existing Item", [""] + items)
-    with col2:
-        item = st.text_input("Item Name (new or existing)", value=item_select or "")
-
-    qty = st.number_input("Quantity", min_value=1, step=1, value=1)
-    normal_price = st.number_input("Normal Price", min_value=0.0, step=0.01)
-    purchase_price = st.number_input("Purchase Price", min_value=0.0, step=0.01)
-    discount_amt = st.number_input("Discount Amount", min_value=0.0, step=0.01)
-    discount_pct = st.number_input("Discount %", min_value=0.0, max_value=100.0, step=0.01)
-
-    submit = st.form_submit_button("✅ Enter Log Entry")
-
-    if submit:
-        if not shop.strip() or not item.strip():
-            st.error("Shop and Item name must not be blank.")
-        else:
-            norm, purc, pct, amt = calculate_missing_fields(normal_price, purchase_price, discount_pct, discount_amt)
-            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-            new_entry = {
-                "DateTime": now,
-                "Shop": shop.strip(),
-                "Item": item.strip(),
-                "Qty": qty,
-                "NormalPrice": norm,
-                "PurchasePrice": purc,
-                "DiscountAmt": amt,
-                "DiscountPct": pct,
-                "TotalNormal": round_or_none(norm * qty),
-                "TotalPurchase": round_or_none(purc * qty),
-                "TotalDiscount": round_or_none(amt * qty)
-            }
-
-            log_df = pd.concat([log_df, pd.DataFrame([new_entry])], ignore_index=True)
-            save_log(log_df.drop(columns=["label"], errors="ignore"))
-            st.success("✅ Entry logged.")
-            st.rerun()
+@st.fragment
+def new_entry_section():
+    with section("new_entry_form"):
+        st.subheader("🆕 New Entry")
+        col1, col2 = st.columns(2)
+        shop_search = col1.text_input("Search shops", placeholder="Type to find a shop")
+        item_search = col2.text_input("Search items", placeholder="Type to find an item")
+        with read_model() as model:
+            shop_options = model.shop_index.suggest(shop_search, MAX_SUGGESTIONS)
+            item_options = model.item_index.suggest(item_search, MAX_SUGGESTIONS)
+        shop_select = col1.selectbox("Select Existing Shop", [""] + shop_options)
+        item_select = col2.selectbox("Select Existing Item", [""] + item_options)
+        with read_model() as model:
+            hint = price_hint(model.price_index, item_select) if item_select else None
+        if hint:
+            st.caption(hint)
+
+        with st.form("new_entry_form"):
+            col1, col2 = st.columns(2)
+
+            with col1:
+                shop = st.text_input("Shop Name (new or existing)", value=shop_select or "")
+            with col2:
+                item = st.text_input("Item Name (new or existing)", value=item_select or "")
+
+            qty = st.number_input("Quantity", min_value=1, step=1, value=1)
+            normal_price = st.number_input("Normal Price", min_value=0.0, step=0.01)
+            purchase_price = st.number_input("Purchase Price", min_value=0.0, step=0.01)
+            discount_amt = st.number_input("Discount Amount", min_value=0.0, step=0.01)
+            discount_pct = st.number_input("Discount %", min_value=0.0, max_value=100.0, step=0.01)
+
+            submit = st.form_submit_button("✅ Enter Log Entry")
+
+            if submit:
+                aliases = load_aliases()
+                with read_model() as model:
+                    shop_index, item_index = model.shop_index, model.item_index
+                    shop = shop_index.resolve(canonical_name(aliases, "Shop", shop))
+                    item = item_index.resolve(canonical_name(aliases, "Item", item))
+                    similar_shops = [] if shop in shop_index else shop_index.fuzzy(shop, 3)
+                    similar_items = [] if item in item_index else item_index.fuzzy(item, 3)
+
+                if not shop or not item:
+                    st.error("Shop and Item name must not be blank.")
+                elif (similar_shops or similar_items) and st.session_state.confirm_new_names != (shop, item):
+                    st.session_state.confirm_new_names = (shop, item)
+                    if similar_shops:
+                        st.warning(f"'{shop}' is a new shop. Did you mean: {', '.join(similar_shops)}?")
+                    if similar_items:
+                        st.warning(f"'{item}' is a new item. Did you mean: {', '.join(similar_items)}?")
+                    st.info("Submit again to add it as new.")
+                else:
+                    st.session_state.confirm_new_names = None
+                    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    new_entry = make_entry(now, shop, item, qty, normal_price, purchase_price, discount_pct, discount_amt)
+                    try:
+                        check_amounts(new_entry)
+                    except ValueError as e:
+                        st.error(str(e))
+                        return
+                    price = new_entry["PurchasePrice"]
+                    budgets = load_budgets()
+                    with read_model() as model:
+                        anomaly = model.price_index.check(item, price)
+                        over = budget_warnings(budgets, model.month_spend, [new_entry])
+
+                    if (anomaly or over) and st.session_state.confirm_warnings != (shop, item, price, qty):
+                        st.session_state.confirm_warnings = (shop, item, price, qty)
+                        if anomaly:
+                            st.warning(
+                                f"⚠️ {price:.2f} is far off the usual price of '{item}': "
+                                f"avg {anomaly['mean']:.2f}, range {anomaly['min']:.2f}–{anomaly['max']:.2f}, "
+                                f"last {anomaly['last']:.2f}."
+                            )
+                        warn_budgets(over)
+                        st.info("Submit again to log it anyway.")
+                    else:
+                        st.session_state.confirm_warnings = None
+                        commit("insert", new_entry)
+                        st.success("✅ Entry logged.")
+                        rerun()
+
+# --- Receipt Entry: many items, one shop and time, one write ---
+@st.fragment
+def receipt_section():
+    with section("receipt_form"):
+        st.subheader("🧾 Receipt Entry")
+        with st.form("receipt_form"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                shop = st.text_input("Shop Name", key="receipt_shop")
+            with col2:
+                receipt_date = st.date_input("Date", value=datetime.now().date(), min_value=MIN_DATE, max_value=MAX_DATE)
+            with col3:
+                receipt_time = st.time_input("Time", value=datetime.now().time().replace(second=0, microsecond=0))
+            st.caption("Lines left without prices take the item's last paid prices.")
+            lines = st.data_editor(
+                blank_lines(), num_rows="dynamic", hide_index=True, use_container_width=True, key="receipt_lines",
+                column_config={"Qty": st.column_config.NumberColumn(min_value=1, step=1)},
+            )
+            submit = st.form_submit_button("🧾 Enter Receipt")
+
+            if submit:
+                aliases = load_aliases()
+                budgets = load_budgets()
+                dt = datetime.combine(receipt_date, receipt_time).strftime("%Y-%m-%d %H:%M:%S")
+                with read_model() as model:
+                    shop = model.shop_index.resolve(canonical_name(aliases, "Shop", shop))
+                    lines["Item"] = [
+                        model.item_index.resolve(canonical_name(aliases, "Item", item)) if isinstance(item, str) else ""
+                        for item in lines["Item"]
+                    ]
+                    rows, unpriced = basket_entries(dt, shop, lines, model.price_index.last, new_basket_id())
+                    entries = rows.to_dict("records")
+                    anomalies = [
+                        (entry["Item"], entry["PurchasePrice"], anomaly) for entry in entries
+                        if (anomaly := model.price_index.check(entry["Item"], entry["PurchasePrice"]))
+                    ]
+                    over = budget_warnings(budgets, model.month_spend, entries)
+                try:
+                    for entry in entries:
+                        check_amounts(entry)
+                except ValueError as e:
+                    st.error(f"{entry['Item']}: {e}")
+                    return
+                receipt_key = (shop, dt, tuple((e["Item"], e["Qty"], e["PurchasePrice"]) for e in entries))
+
+                if not shop:
+                    st.error("Shop name must not be blank.")
+                elif unpriced:
+                    st.error(f"No price given or known for: {', '.join(unpriced)}.")
+                elif not entries:
+                    st.error("Add at least one item.")
+                elif (anomalies or over) and st.session_state.confirm_receipt != receipt_key:
+                    st.session_state.confirm_receipt = receipt_key
+                    for item, price, anomaly in anomalies:
+                        st.warning(
+                            f"⚠️ {price:.2f} is far off the usual price of '{item}': "
+                            f"avg {anomaly['mean']:.2f}, last {anomaly['last']:.2f}."
+                        )
+                    warn_budgets(over)
+                    st.info("Submit again to log it anyway.")
+                else:
+                    st.session_state.confirm_receipt = None
+                    commit("insert_many", entries)
+                    del st.session_state["receipt_lines"]
+                    st.success(f"✅ Receipt {rows['BasketID'][0]} logged: {len(entries)} items, {rows['TotalPurchase'].sum():.2f}.")
+                    rerun()
+
+        with read_model() as model:
+            log_df = model.df.copy(deep=False)
+        receipts = baskets(log_df)
+        if len(receipts):
+            with st.expander("🧾 Past Receipts"):
+                st.dataframe(receipts, hide_index=True, use_container_width=True)
+                names = dict(zip(receipts["BasketID"], receipts["DateTime"].astype(str) + " - " + receipts["Shop"].astype(str)))
+                basket_id = st.selectbox("Show receipt", list(names), format_func=names.get)
+                st.dataframe(basket_rows(log_df, basket_id), hide_index=True, use_container_width=True)
 
 # --- Clear Actions with Confirmation ---
-st.subheader("🗑️ Log Actions")
+@st.fragment
+def log_actions_section():
+    with section("log_actions"):
+        st.subheader("🗑️ Log Actions")
+        with read_model() as model:
+            log_empty = model.df.empty
+        col1, col2 = st.columns(2)
+
+        # --- Clear Last Entry ---
+        with col1:
+            if st.button("❌ Clear Last Entry"):
+                if not log_empty:
+                    st.session_state.confirm_clear_last = True
+                else:
+                    st.warning("⚠️ Log is already empty.")
+
+            if st.session_state.confirm_clear_last:
+                st.warning("Are you sure you want to remove the last entry?")
+                c1, c2 = st.columns(2)
+                with c1:
+                    if st.button("✅ Yes, remove last entry"):
+                        commit("delete_last")
+                        st.session_state.confirm_clear_last = False
+                        st.success("✅ Last entry removed.")
+                        rerun()
+                with c2:
+                    if st.button("❌ Cancel"):
+                        st.session_state.confirm_clear_last = False
+                        st.info("Action canceled.")
+
+        # --- Clear Entire Log ---
+        with col2:
+            if st.button("🔥 Clear Entire Log"):
+                if not log_empty:
+                    st.session_state.confirm_clear_all = True
+                else:
+                    st.warning("⚠️ Log is already empty.")
+
+            if st.session_state.confirm_clear_all:
+                st.warning("Are you sure you want to clear the entire log? This cannot be undone.")
+                c3, c4 = st.columns(2)
+                with c3:
+                    if st.button("✅ Yes, clear entire log"):
+                        commit("clear")
+                        st.session_state.confirm_clear_all = False
+                        st.success("✅ Entire log cleared.")
+                        rerun()
+                with c4:
+                    if st.button("❌ Cancel"):
+                        st.session_state.confirm_clear_all = False
+                        st.info("Action canceled.")
+
+# --- Aliases ---
+@st.fragment
+def aliases_section():
+    with section("aliases"), st.expander("🔤 Shop/Item Aliases"):
+        aliases = load_aliases()
+        with st.form("alias_form"):
+            alias_kind = st.selectbox("Type", ALIAS_KINDS)
+            alias_name = st.text_input("Alias (e.g. EGGS 18pk)")
+            alias_target = st.text_input("Canonical name (e.g. Eggs)")
+            if st.form_submit_button("➕ Add Alias"):
+                if not alias_name.strip() or not alias_target.strip():
+                    st.error("Alias and canonical name must not be blank.")
+                else:
+                    try:
+                        add_alias(aliases, alias_kind, alias_name, alias_target)
+                    except ValueError as e:
+                        st.error(f"❌ {e}")
+                    else:
+                        save_aliases(aliases)
+                        target = canonical_name(aliases, alias_kind, alias_name)
+                        st.success(f"✅ '{alias_name.strip()}' now maps to '{target}'.")
+
+        n_aliases = sum(len(aliases[kind]) for kind in ALIAS_KINDS)
+        st.caption(f"{n_aliases} aliases defined. Re-mapping also merges case/spacing variants.")
+        if st.button("🔁 Re-map Log"):
+            changed = commit("remap", aliases)
+            if changed:
+                st.success(f"✅ {changed} values re-mapped.")
+                rerun()
+            else:
+                st.info("Log already uses canonical names.")
+
+# --- Monthly Budgets ---
+@st.fragment
+def budgets_section():
+    with section("budgets"), st.expander("💰 Monthly Budgets"):
+        budgets = load_budgets()
+        with st.form("budget_form"):
+            budget_kind = st.selectbox("Envelope for", BUDGET_KINDS)
+            budget_name = st.text_input("Shop or item name")
+            budget_amount = st.number_input("Monthly budget (0 removes it)", min_value=0.0, step=10.0)
+            if st.form_submit_button("💾 Save Budget"):
+                if not budget_name.strip():
+                    st.error("Name must not be blank.")
+                else:
+                    save_budgets(set_budget(budgets, budget_kind, budget_name, budget_amount))
+                    st.success(f"✅ Budget for '{budget_name.strip()}' saved.")
+        month = datetime.now().strftime("%Y-%m")
+        with read_model() as model:
+            status = budget_status(budgets, model.month_spend, month)
+        if status.empty:
+            st.caption("No budgets yet.")
+        else:
+            st.dataframe(status, hide_index=True, use_container_width=True)
+
+# --- Log View and Summary ---
+@st.fragment
+def log_view_section():
+    with section("log_view"):
+        # --- Period Filter ---
+        period = st.selectbox("📅 Period", PERIODS)
+        start, end = period_bounds(period)
+        with read_model() as model:
+            log_df = model.df.copy(deep=False)
+            positions = model.time_index.positions(start, end) if period != "All" else slice(None)
+            totals = model.range_totals.total(start, end)
+            pivot = model.summary(start, end)
+            forecast = model.forecast()
+        view_df = log_df.iloc[positions]
+
+        # --- Display Log ---
+        st.subheader("📒 Full Log")
+        if not view_df.empty:
+            st.dataframe(view_df, use_container_width=True)
+        elif not log_df.empty:
+            st.info(f"No entries for {period.lower()}.")
+        else:
+            st.info("No entries yet.")
+        with st.expander("🔍 Price audit"):
+            if st.button("Scan log for unusual prices"):
+                flagged = audit_prices(log_df)
+                if flagged.empty:
+                    st.success("No unusual prices found.")
+                else:
+                    st.dataframe(flagged, use_container_width=True)
+
+    # --- Summary ---
+    with section("summary"):
+        if not view_df.empty:
+            st.subheader("📊 Summary (Daily Totals)")
+            st.caption(
+                f"{totals['Entries']} entries · spent {totals['TotalPurchase']:.2f} · "
+                f"saved {totals['TotalDiscount']:.2f}"
+            )
+            st.dataframe(pivot, use_container_width=True)
+
+            st.subheader("🔮 Spend Forecast")
+            st.caption("This month (spent so far plus the expected rest) and next month, per shop.")
+            st.dataframe(forecast, use_container_width=True)
+
+# --- Rolling Spend Dashboard (cached on the shared model per log version) ---
+@st.fragment
+def rolling_section():
+    with section("rolling"):
+        st.subheader("📈 Rolling Spend")
+        with read_model() as model:
+            view = model.rolling()
+        if not len(view.dates):
+            st.info("No entries yet.")
+        else:
+            latest = view.latest()
+            for col, window in zip(st.columns(len(WINDOWS)), WINDOWS):
+                col.metric(
+                    f"Last {window} days", f"{latest[(window, 'Spent')]:.2f}",
+                    help=f"Saved {latest[(window, 'Saved')]:.2f} · {int(latest[(window, 'Entries')])} entries",
+                )
+            window = st.radio("Window", WINDOWS, index=1, horizontal=True, format_func=lambda w: f"{w} days")
+            metric = st.radio("Metric", METRICS, horizontal=True)
+            shops = st.multiselect("Shops", view.shops, default=[ALL_SHOPS] + view.top_shops(4))
+            points, _ = bucket(view.frame(window, metric)[shops], how="mean")
+            metrics.count("chart_points", len(points) * len(shops))
+            st.line_chart(points)
+
+# --- Spending Charts (downsampled server side; zooming in refines the buckets) ---
+@st.fragment
+def charts_section():
+    with section("charts"):
+        st.subheader("📉 Spending Over Time")
+        with read_model() as model:
+            daily = model.summary()
+        if daily.empty:
+            st.info("No entries yet.")
+            return
+        first, last = daily["Date"].min(), daily["Date"].max()
+        if first < last:
+            first, last = st.slider("Zoom", min_value=first, max_value=last, value=(first, last))
+        in_range = daily[(daily["Date"] >= first) & (daily["Date"] <= last)]
+        points, size = bucket(in_range.groupby("Date")["TotalPurchase"].sum())
+        st.bar_chart(points)
+        st.caption(f"{len(points)} points · {size}-day buckets")
+        history_search = st.text_input("Search items", placeholder="Type to find an item", key="history_search")
+        with read_model() as model:
+            item_options = model.item_index.suggest(history_search, MAX_SUGGESTIONS)
+        item = st.selectbox("Price history for", [""] + item_options)
+        prices = []
+        if item:
+            with read_model() as model:
+                history = [p for p in model.price_index.history(item) if str(first) <= p.DateTime[:10] <= str(last)]
+            prices = price_series(history)
+            st.line_chart(prices)
+        metrics.count("chart_points", len(points) + len(prices))
+
+# --- SQL Console (only when duckdb is installed) ---
+@st.fragment
+def sql_console_section():
+    from exp_sql import connect, duckdb, query_arrow
+    with section("sql_console"):
+        st.subheader("🧮 SQL Console")
+        with st.form("sql_form"):
+            sql = st.text_area("Query (the log is the table `log`)", DEFAULT_SQL, height=140)
+            run_sql = st.form_submit_button("Run")
+        if run_sql:
+            try:
+                with read_model() as model:
+                    log_df = model.df.copy(deep=False)
+                table, truncated = query_arrow(connect(log_df, sandbox=True), sql, MAX_SQL_ROWS)
+            except (duckdb.Error, ValueError) as e:
+                st.error(f"❌ {e}")
+            else:
+                metrics.count("sql_rows", table.num_rows)
+                st.dataframe(table, use_container_width=True)
+                if truncated:
+                    st.caption(f"First {MAX_SQL_ROWS} rows shown.")
+
+# Poll the shared store and rerun the page when another session changed the log
+@st.fragment(run_every="5s")
+def watch_store():
+    if st.session_state.get("seen_version") != get_store().version:
+        st.rerun()
 
-# Initialize confirmation states
-if "confirm_clear_last" not in st.session_state:
-    st.session_state.confirm_clear_last = False
-if "confirm_clear_all" not in st.session_state:
-    st.session_state.confirm_clear_all = False
+# App Start
+metrics = RunMetrics(APP_NAME)
+with metrics.timer("startup"), read_model():
+    pass
+store = get_store()
+if st.session_state.get("seen_version") not in (None, store.version):
+    st.toast("🔄 Log updated by another session.")
+st.session_state.seen_version = store.version
+
+for key, default in [("confirm_new_names", None), ("confirm_warnings", None), ("confirm_receipt", None), ("confirm_clear_last", False), ("confirm_clear_all", False)]:
+    if key not in st.session_state:
+        st.session_state[key] = default
 
-col1, col2 = st.columns(2)
+st.title("📋 Expenditure Tracker")
 
-# --- Clear Last Entry ---
-with col1:
-    if st.button("❌ Clear Last Entry"):
-        if not log_df.empty:
-            st.session_state.confirm_clear_last = True
-        else:
-            st.warning("⚠️ Log is already empty.")
-
-    if st.session_state.confirm_clear_last:
-        st.warning("Are you sure you want to remove the last entry?")
-        c1, c2 = st.columns(2)
-        with c1:
-            if st.button("✅ Yes, remove last entry"):
-                log_df = log_df.iloc[:-1]
-                save_log(log_df.drop(columns=["label"], errors="ignore"))
-                st.session_state.confirm_clear_last = False
-                st.success("✅ Last entry removed.")
-                st.rerun()
-        with c2:
-            if st.button("❌ Cancel"):
-                st.session_state.confirm_clear_last = False
-                st.info("Action canceled.")
-
-# --- Clear Entire Log ---
-with col2:
-    if st.button("🔥 Clear Entire Log"):
-        if not log_df.empty:
-            st.session_state.confirm_clear_all = True
-        else:
-            st.warning("⚠️ Log is already empty.")
-
-    if st.session_state.confirm_clear_all:
-        st.warning("Are you sure you want to clear the entire log? This cannot be undone.")
-        c3, c4 = st.columns(2)
-        with c3:
-            if st.button("✅ Yes, clear entire log"):
-                log_df = log_df.iloc[0:0]
-                save_log(log_df.drop(columns=["label"], errors="ignore"))
-                st.session_state.confirm_clear_all = False
-                st.success("✅ Entire log cleared.")
-                st.rerun()
-        with c4:
-            if st.button("❌ Cancel"):
-                st.session_state.confirm_clear_all = False
-                st.info("Action canceled.")
-
-# --- Display Log ---
-st.subheader("📒 Full Log")
-if not log_df.empty:
-    st.dataframe(log_df.drop(columns=["label"], errors="ignore"), use_container_width=True)
-else:
-    st.info("No entries yet.")
-
-# --- Summary ---
-if not log_df.empty:
-    st.subheader("📊 Summary (Daily Totals)")
-    log_df["Date"] = pd.to_datetime(log_df["DateTime"]).dt.date
-    pivot = log_df.groupby(["Date", "Shop"]).agg({
-        "TotalNormal": "sum",
-        "TotalPurchase": "sum",
-        "TotalDiscount": "sum"
-    }).reset_index()
-    st.dataframe(pivot, use_container_width=True)
+edit_section()
+new_entry_section()
+receipt_section()
+log_actions_section()
+aliases_section()
+budgets_section()
+log_view_section()
+rolling_section()
+charts_section()
+if sql_available():
+    sql_console_section()
+watch_store()
+
+# --- Debug Panel ---
+if st.sidebar.checkbox("🐞 Show timings"):
+    st.sidebar.dataframe(metrics.frame(), hide_index=True)
+    st.sidebar.json(metrics.record["counts"])
+    history = load_metrics()
+    if not history.empty:
+        st.sidebar.caption("Recent reruns")
+        st.sidebar.dataframe(history.tail(20).iloc[::-1], hide_index=True)
+metrics.write()
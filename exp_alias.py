@@ -0,0 +1,95 @@
+import os
+import numpy as np
+import pandas as pd
+from exp_names import normalize_key
+
+ALIAS_FILE = "aliases.csv"
+ALIAS_COLUMNS = ["Kind", "Alias", "Canonical"]
+ALIAS_KINDS = ["Shop", "Item"]
+
+# Load alias table as {"Shop": {alias_key: canonical}, "Item": {...}}
+def load_aliases(path=ALIAS_FILE):
+    aliases = {kind: {} for kind in ALIAS_KINDS}
+    if not os.path.exists(path):
+        return aliases
+    df = pd.read_csv(path, dtype=str).dropna()
+    for kind, alias, canonical in df[ALIAS_COLUMNS].itertuples(index=False):
+        if kind in aliases:
+            aliases[kind][normalize_key(alias)] = canonical.strip()
+    return aliases
+
+def save_aliases(aliases, path=ALIAS_FILE):
+    rows = [
+        {"Kind": kind, "Alias": alias, "Canonical": canonical}
+        for kind in ALIAS_KINDS
+        for alias, canonical in sorted(aliases[kind].items())
+    ]
+    pd.DataFrame(rows, columns=ALIAS_COLUMNS).to_csv(path, index=False)
+
+def add_alias(aliases, kind, alias, canonical):
+    key = normalize_key(alias)
+    # Keep chains flat both ways: a target that is itself an alias resolves
+    # to its canonical name, and anything that pointed at the alias follows
+    canonical = canonical.strip()
+    canonical = aliases[kind].get(normalize_key(canonical), canonical)
+    if normalize_key(canonical) == key:
+        raise ValueError(f"'{alias.strip()}' would be an alias of itself")
+    aliases[kind][key] = canonical
+    for other, target in aliases[kind].items():
+        if normalize_key(target) == key:
+            aliases[kind][other] = canonical
+    return aliases
+
+# Insert-time lookup for a single name
+def canonical_name(aliases, kind, name):
+    name = str(name).strip()
+    return aliases[kind].get(normalize_key(name), name)
+
+def normalize_keys(series):
+    return (
+        series.astype(str).str.lower()
+        .str.replace(r"[^\w\s]", " ", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+# Canonical value for each distinct name: alias table first, then (optionally)
+# one spelling per normalized key of the result. An alias target always wins
+# its key; otherwise the most frequent spelling does, ties to the first seen.
+def canonical_map(series, aliases, kind, merge_case=True):
+    values = series.dropna().astype(str)
+    if values.empty:
+        return pd.Series(dtype=object)
+    names = pd.Series(pd.unique(values))                # first-seen order
+    names.index = names.values
+    targets = normalize_keys(names).map(aliases[kind]).fillna(names.str.strip())
+    if not merge_case:
+        return targets
+    table = pd.DataFrame({
+        "target": targets.values,
+        "n": values.value_counts()[names.index].values,
+        "order": np.arange(len(names)),
+    })
+    table["key"] = normalize_keys(table["target"]).values
+    spellings = table.groupby("target", sort=False).agg(n=("n", "sum"), order=("order", "min"), key=("key", "first"))
+    best = spellings.sort_values(["n", "order"], ascending=[False, True]).reset_index().drop_duplicates("key")
+    winner = dict(zip(best["key"], best["target"]))
+    canonical = pd.Series(list(dict.fromkeys(aliases[kind].values())), dtype=object)
+    winner.update(zip(normalize_keys(canonical), canonical))
+    return pd.Series(table["key"].map(winner).values, index=names.index)
+
+# Re-map Shop/Item columns of the whole log in one pass over the distinct values
+def canonicalize(df, aliases, merge_case=True):
+    df = df.copy()
+    changed = 0
+    for kind in ALIAS_KINDS:
+        if kind not in df.columns or df.empty:
+            continue
+        mapping = canonical_map(df[kind], aliases, kind, merge_case)
+        codes, uniques = pd.factorize(df[kind])
+        # Trailing None is picked up by the -1 code factorize uses for missing values
+        targets = np.array([mapping.get(str(name), name) for name in uniques] + [None], dtype=object)
+        new_col = pd.Series(targets[codes], index=df.index, dtype=object)
+        changed += int((new_col.notna() & (new_col != df[kind])).sum())
+        df[kind] = new_col
+    return df, changed
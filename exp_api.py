@@ -0,0 +1,191 @@
+import csv
+import json
+import queue
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pandas as pd
+from exp_alias import canonical_name, load_aliases
+from exp_core import LOG_FILE, entry_from_dict
+from exp_pipeline import records_from_text, run_pipeline
+from exp_store import LogStore
+
+MAX_BATCH = 1000
+MAX_DELAY = 0.02          # seconds a batch may wait for more entries
+
+# Group commit: entries from concurrent requests are merged into one
+# store.insert_many (one append to the file) per batch
+class BatchWriter:
+    def __init__(self, store, max_batch=MAX_BATCH, max_delay=MAX_DELAY):
+        self.store = store
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.pending = queue.Queue()
+        self.batches = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, entries):
+        future = Future()
+        self.pending.put((entries, future))
+        return future
+
+    def _run(self):
+        while True:
+            jobs = [self.pending.get()]
+            size = len(jobs[0][0])
+            try:
+                while size < self.max_batch:
+                    jobs.append(self.pending.get(timeout=self.max_delay))
+                    size += len(jobs[-1][0])
+            except queue.Empty:
+                pass
+            entries = [entry for batch, _ in jobs for entry in batch]
+            try:
+                indexes, _ = self.store.insert_many(entries)
+            except Exception as e:
+                for _, future in jobs:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            pos = 0
+            for batch, future in jobs:
+                future.set_result(indexes[pos:pos + len(batch)])
+                pos += len(batch)
+
+def parse_date(value):
+    return pd.Timestamp(value).to_pydatetime() if value else None
+
+def shop_totals(summary):
+    cols = ["TotalNormal", "TotalPurchase", "TotalDiscount"]
+    return summary.groupby("Shop")[cols].sum().round(2).reset_index()
+
+def records(df):
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+class ApiHandler(BaseHTTPRequestHandler):
+    store = None
+    writer = None
+    quiet = True
+
+    def log_message(self, fmt, *args):
+        if not self.quiet:
+            super().log_message(fmt, *args)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # Request body, or None when Content-Length is not a byte count
+    def read_body(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            return None
+        return self.rfile.read(length) if length >= 0 else None
+
+    # POST /import  body: CSV (text/csv) or JSON lines (application/x-ndjson),
+    # run through the ingestion pipeline
+    def import_bulk(self):
+        body = self.read_body()
+        if body is None:
+            return self.send_json(400, {"error": "invalid Content-Length"})
+        try:
+            text = body.decode("utf-8-sig")
+        except UnicodeDecodeError as e:
+            return self.send_json(400, {"error": f"body is not UTF-8: {e}"})
+        records = records_from_text(text, self.headers.get("Content-Type", "text/csv"))
+        try:
+            result = run_pipeline(self.store, records)
+        except (csv.Error, ValueError, TypeError) as e:
+            return self.send_json(400, {"error": f"import failed: {e}"})
+        self.send_json(200, result)
+
+    # POST /entries  body: one entry object or a list of them
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path == "/import":
+            return self.import_bulk()
+        if path != "/entries":
+            return self.send_json(404, {"error": "not found"})
+        body = self.read_body()
+        if body is None:
+            return self.send_json(400, {"error": "invalid Content-Length"})
+        try:
+            data = json.loads(body or b"null")
+        except json.JSONDecodeError as e:
+            return self.send_json(400, {"error": f"invalid JSON: {e}"})
+        items = data if isinstance(data, list) else [data]
+        aliases = load_aliases()
+        entries, errors = [], []
+        for i, item in enumerate(items):
+            try:
+                entry = entry_from_dict(item)
+            except ValueError as e:
+                errors.append({"index": i, "error": str(e)})
+                continue
+            entry["Shop"] = canonical_name(aliases, "Shop", entry["Shop"])
+            entry["Item"] = canonical_name(aliases, "Item", entry["Item"])
+            entries.append(entry)
+        if errors:
+            return self.send_json(422, {"errors": errors})
+        with self.store.read() as model:
+            warnings = [
+                {"index": i, "item": entry["Item"], "price": entry["PurchasePrice"], "item_mean": round(anomaly["mean"], 2)}
+                for i, entry in enumerate(entries)
+                if (anomaly := model.price_index.check(entry["Item"], entry["PurchasePrice"]))
+            ]
+        indexes = self.writer.submit(entries).result() if entries else []
+        with self.store.read() as model:
+            rows = len(model.df)
+        self.send_json(201, {"added": len(indexes), "rows": rows, "warnings": warnings})
+
+    # GET /summary?start=YYYY-MM-DD&end=YYYY-MM-DD   daily totals per shop
+    # GET /summary/shops?start=...&end=...            totals per shop
+    # GET /totals?start=...&end=...&shop=...        range totals from the prefix sums
+    # GET /totals/shops?start=...&end=...            the same per shop
+    # GET /health
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == "/health":
+            with self.store.read() as model:
+                rows = len(model.df)
+            return self.send_json(200, {"rows": rows, "version": self.store.version})
+        if url.path not in ("/summary", "/summary/shops", "/totals", "/totals/shops"):
+            return self.send_json(404, {"error": "not found"})
+        try:
+            start, end = parse_date(query.get("start")), parse_date(query.get("end"))
+        except ValueError as e:
+            return self.send_json(400, {"error": str(e)})
+        with self.store.read() as model:
+            if url.path == "/totals":
+                payload = model.range_totals.total(start, end, query.get("shop"))
+            elif url.path == "/totals/shops":
+                payload = records(model.range_totals.by_shop(start, end))
+            else:
+                summary = model.summary(start, end)
+                payload = records(shop_totals(summary) if url.path == "/summary/shops" else summary)
+        self.send_json(200, payload)
+
+def make_server(host="127.0.0.1", port=8502, path=LOG_FILE, store=None, quiet=True):
+    store = store or LogStore(path)
+    handler = type("Handler", (ApiHandler,), {
+        "store": store, "writer": BatchWriter(store), "quiet": quiet,
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+def serve(host="127.0.0.1", port=8502, path=LOG_FILE, quiet=False):
+    server = make_server(host, port, path, quiet=quiet)
+    print(f"Serving {path} on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,172 @@
+import gzip
+import io
+import json
+import os
+from datetime import datetime
+import pandas as pd
+from exp_core import LOG_COLUMNS, LOG_DTYPES, LOG_FILE, in_range, save_log
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CHUNK_ROWS = 5000         # rows per independently compressed chunk
+KEEP_MONTHS = 3           # current month plus the two before it stay in the live CSV
+EXTENSIONS = {"gzip": "gz", "zstd": "zst"}
+
+# <log>.archive/ holds one segment per month (YYYY-MM.csv.gz or .zst) and
+# manifest.json. A segment is a run of compressed chunks of header-less CSV
+# sorted by DateTime; the manifest records each chunk's byte range and time
+# span, so a range read seeks to and inflates only the chunks it needs.
+# gzip chunks are separate gzip members, so the whole file still reads with zcat.
+def archive_dir(path=LOG_FILE):
+    return path + ".archive"
+
+def default_codec():
+    return "zstd" if zstandard else "gzip"
+
+def compress(data, codec):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+def decompress(data, codec):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("archive segment is zstd-compressed; install the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+def load_manifest(path=LOG_FILE):
+    try:
+        with open(os.path.join(archive_dir(path), "manifest.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"segments": {}}
+
+def save_manifest(path, manifest):
+    file = os.path.join(archive_dir(path), "manifest.json")
+    with open(file + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(file + ".tmp", file)
+
+def archived_rows(path=LOG_FILE):
+    return sum(seg["rows"] for seg in load_manifest(path)["segments"].values())
+
+# "YYYY-MM" per row (NaN for unparseable dates); formats each distinct month once
+def month_keys(df):
+    times = pd.to_datetime(df["DateTime"], errors="coerce")
+    months = times.dt.year * 100 + times.dt.month
+    return months.map({m: f"{int(m) // 100:04d}-{int(m) % 100:02d}" for m in months.dropna().unique()})
+
+def overlaps(span, start, end):
+    return (start is None or pd.Timestamp(span["end"]) >= pd.Timestamp(start)) and \
+           (end is None or pd.Timestamp(span["start"]) < pd.Timestamp(end))
+
+def _write_segment(path, month, rows, codec):
+    times = pd.to_datetime(rows["DateTime"], errors="coerce")
+    order = times.argsort(kind="stable")
+    rows, times = rows.iloc[order], times.iloc[order]
+    name = f"{month}.csv.{EXTENSIONS[codec]}"
+    file = os.path.join(archive_dir(path), name)
+    chunks = []
+    with open(file + ".tmp", "wb") as f:
+        for i in range(0, len(rows), CHUNK_ROWS):
+            part = rows.iloc[i:i + CHUNK_ROWS]
+            blob = compress(part[LOG_COLUMNS].to_csv(index=False, header=False).encode(), codec)
+            chunks.append({
+                "offset": f.tell(), "length": len(blob), "rows": len(part),
+                "start": str(times.iloc[i]), "end": str(times.iloc[i + len(part) - 1]),
+            })
+            f.write(blob)
+    os.replace(file + ".tmp", file)
+    return {
+        "file": name, "codec": codec, "rows": len(rows),
+        "start": chunks[0]["start"], "end": chunks[-1]["end"], "chunks": chunks,
+    }
+
+# (Re)write the segments for `months` (default: every month in df or the
+# manifest) from the archived rows in df; months with no rows are removed
+def write_segments(path, df, months=None, codec=None):
+    manifest = load_manifest(path)
+    codec = codec or default_codec()
+    keys = month_keys(df)
+    if months is None:
+        months = set(manifest["segments"]) | set(keys.dropna())
+    os.makedirs(archive_dir(path), exist_ok=True)
+    for month in sorted(months):
+        old = manifest["segments"].pop(month, None)
+        rows = df[keys == month]
+        if len(rows):
+            manifest["segments"][month] = _write_segment(path, month, rows, codec)
+        if old and (not len(rows) or old["file"] != manifest["segments"][month]["file"]):
+            os.remove(os.path.join(archive_dir(path), old["file"]))
+    save_manifest(path, manifest)
+
+# Decompressed header-less CSV bytes of one chunk
+def chunk_bytes(path, segment, chunk):
+    with open(os.path.join(archive_dir(path), segment["file"]), "rb") as f:
+        f.seek(chunk["offset"])
+        return decompress(f.read(chunk["length"]), segment["codec"])
+
+def read_chunk(path, segment, chunk, usecols=None):
+    data = chunk_bytes(path, segment, chunk)
+    return pd.read_csv(io.BytesIO(data), header=None, names=LOG_COLUMNS, usecols=usecols, dtype=LOG_DTYPES)
+
+# (segment, chunk) pairs overlapping [start, end), oldest first
+def archive_chunks(path=LOG_FILE, start=None, end=None):
+    return [
+        (segment, chunk) for _, segment in sorted(load_manifest(path)["segments"].items())
+        if overlaps(segment, start, end)
+        for chunk in segment["chunks"] if overlaps(chunk, start, end)
+    ]
+
+# Archived rows with start <= DateTime < end; chunks outside the range are
+# never read or decompressed
+def read_archive(path=LOG_FILE, start=None, end=None, months=None):
+    frames = []
+    for month, segment in sorted(load_manifest(path)["segments"].items()):
+        if months is not None and month not in months or not overlaps(segment, start, end):
+            continue
+        frames += [read_chunk(path, segment, chunk) for chunk in segment["chunks"]
+                   if overlaps(chunk, start, end)]
+    if not frames:
+        return pd.DataFrame(columns=LOG_COLUMNS)
+    return in_range(pd.concat(frames, ignore_index=True), start, end)
+
+# Move live rows older than the last `keep_months` months into the archive,
+# merging with any segment already holding that month
+def archive_log(path=LOG_FILE, keep_months=KEEP_MONTHS, codec=None, now=None):
+    if not os.path.exists(path):
+        return 0
+    live = pd.read_csv(path, dtype=LOG_DTYPES)
+    period = pd.Timestamp(now or datetime.now()).to_period("M")
+    cutoff = (period - (keep_months - 1)).start_time
+    old = (pd.to_datetime(live["DateTime"], errors="coerce") < cutoff).to_numpy()
+    if not old.any():
+        return 0
+    moved = live[old]
+    months = set(month_keys(moved))
+    existing = read_archive(path, months=months)
+    merged = pd.concat([existing, moved], ignore_index=True) if len(existing) else moved
+    write_segments(path, merged, months, codec)
+    save_log(live[~old], path)
+    return int(old.sum())
+
+# Logs written before a column was added (BasketID) get it, empty, in the
+# live CSV and in every archive segment; readers can then rely on one layout.
+# Header-less archive chunks of the old width read back with the new column
+# empty. Returns True when the log was rewritten.
+def upgrade_log(path=LOG_FILE):
+    if not os.path.exists(path) or not os.path.getsize(path):
+        return False
+    with open(path, newline="") as f:
+        header = f.readline().strip().split(",")
+    if header == LOG_COLUMNS:
+        return False
+    if load_manifest(path)["segments"]:
+        write_segments(path, read_archive(path).reindex(columns=LOG_COLUMNS))
+    live = pd.read_csv(path, dtype=LOG_DTYPES)
+    save_log(live.reindex(columns=LOG_COLUMNS), path)
+    return True
@@ -0,0 +1,108 @@
+import os
+import pandas as pd
+from exp_archive import archive_chunks, chunk_bytes
+from exp_core import LOG_COLUMNS, LOG_FILE, PRICE_COLUMNS, build_labels, daily_summary, load_log
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+BACKENDS = ["pandas", "polars"]
+SUMMARY_COLUMNS = ["TotalNormal", "TotalPurchase", "TotalDiscount"]
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# The load/filter/aggregate steps the app runs over a whole log, with one
+# implementation per engine. Results stay in the backend's own frame type
+# until to_pandas() (the st.dataframe / CSV boundary).
+class PandasBackend:
+    name = "pandas"
+
+    def load(self, path=LOG_FILE, start=None, end=None):
+        return load_log(path, start, end)
+
+    # Whole log as a pandas frame (the LogStore's cold load)
+    def read(self, path=LOG_FILE):
+        return self.load(path)
+
+    def daily_summary(self, df):
+        summary = daily_summary(df)
+        summary[SUMMARY_COLUMNS] = summary[SUMMARY_COLUMNS].round(2)
+        return summary.sort_values(["Date", "Shop"], ignore_index=True)
+
+    def names(self, df, col):
+        return sorted(df[col].dropna().astype(str).unique())
+
+    def labels(self, df):
+        return build_labels(df)
+
+    def to_pandas(self, frame):
+        return frame
+
+# Lazy scans of the live CSV and the overlapping archive chunks; filters and
+# aggregations are planned together and run multithreaded on collect()
+class PolarsBackend:
+    name = "polars"
+
+    def __init__(self):
+        if pl is None:
+            raise RuntimeError("the polars backend needs the polars package (pip install polars)")
+        self.schema = {
+            "DateTime": pl.Utf8, "Shop": pl.Utf8, "Item": pl.Utf8, "Qty": pl.Int64,
+            **{col: pl.Float64 for col in PRICE_COLUMNS}, "BasketID": pl.Utf8,
+        }
+
+    def load(self, path=LOG_FILE, start=None, end=None):
+        frames = [
+            pl.read_csv(chunk_bytes(path, segment, chunk), has_header=False,
+                        new_columns=LOG_COLUMNS, schema=self.schema).lazy()
+            for segment, chunk in archive_chunks(path, start, end)
+        ]
+        if os.path.exists(path):
+            frames.append(pl.scan_csv(path, schema=self.schema))
+        lf = pl.concat(frames) if frames else pl.LazyFrame(schema=self.schema)
+        if start is None and end is None:
+            return lf
+        when = pl.col("DateTime").str.strptime(pl.Datetime, TIME_FORMAT, strict=False)
+        if start is not None:
+            lf = lf.filter(when >= pd.Timestamp(start).to_pydatetime())
+        if end is not None:
+            lf = lf.filter(when < pd.Timestamp(end).to_pydatetime())
+        return lf
+
+    def read(self, path=LOG_FILE):
+        return self.to_pandas(self.load(path).collect())
+
+    def daily_summary(self, lf):
+        date = pl.col("DateTime").str.strptime(pl.Datetime, TIME_FORMAT, strict=False).dt.date()
+        return (
+            lf.with_columns(date.alias("Date"))
+            .drop_nulls("Date")
+            .group_by(["Date", "Shop"])
+            .agg([pl.col(col).sum().round(2) for col in SUMMARY_COLUMNS])
+            .sort(["Date", "Shop"])
+            .collect()
+        )
+
+    def names(self, lf, col):
+        return lf.select(pl.col(col).drop_nulls().unique().sort()).collect().to_series().to_list()
+
+    def labels(self, lf):
+        return lf.select(pl.concat_str([
+            pl.col("DateTime"), pl.lit(" - "), pl.col("Shop"), pl.lit(" - "),
+            pl.col("Item"), pl.lit(" (x"), pl.col("Qty").cast(pl.Utf8), pl.lit(")"),
+        ]).alias("Label")).collect().to_series()
+
+    def to_pandas(self, frame):
+        df = frame.to_pandas()
+        if "Date" in df:
+            df["Date"] = df["Date"].dt.date       # same python dates as the pandas path
+        return df
+
+def get_backend(name=None):
+    name = name or os.environ.get("EXP_BACKEND", "pandas")
+    if name == "polars":
+        return PolarsBackend()
+    if name == "pandas":
+        return PandasBackend()
+    raise ValueError(f"unknown backend {name!r}; choose from {BACKENDS}")
@@ -0,0 +1,82 @@
+from uuid import uuid4
+import numpy as np
+import pandas as pd
+from exp_core import LOG_COLUMNS
+
+LINE_COLUMNS = ["Item", "Qty", "NormalPrice", "PurchasePrice", "DiscountAmt", "DiscountPct"]
+BLANK_LINES = 10
+
+# Empty receipt grid for the data editor
+def blank_lines(n=BLANK_LINES):
+    lines = pd.DataFrame({col: [np.nan] * n for col in LINE_COLUMNS})
+    lines["Item"] = ""
+    lines["Qty"] = 1
+    return lines
+
+# calculate_missing_fields over whole columns at once (NaN = not given)
+def fill_prices(norm, purc, disc_pct, disc_amt):
+    norm = pd.to_numeric(norm, errors="coerce").where(lambda s: s > 0)
+    purc = pd.to_numeric(purc, errors="coerce").where(lambda s: s > 0)
+    disc_pct = pd.to_numeric(disc_pct, errors="coerce").where(lambda s: s > 0)     # 0 = not given
+    disc_amt = pd.to_numeric(disc_amt, errors="coerce").where(lambda s: s > 0)
+
+    purc = purc.fillna((norm - disc_amt).where(disc_amt.notna()))
+    purc = purc.fillna(norm * (1 - disc_pct / 100))
+    norm = norm.fillna(purc + disc_amt)
+    norm = norm.fillna((purc / (1 - disc_pct / 100)).where(disc_pct < 100))
+
+    no_discount = disc_amt.isna() & disc_pct.isna()
+    norm = norm.fillna(purc.where(no_discount))
+    purc = purc.fillna(norm.where(no_discount))
+
+    disc_amt = disc_amt.fillna(norm - purc).fillna(norm * disc_pct / 100)
+    disc_pct = disc_pct.fillna((disc_amt / norm * 100).where(norm > 0, 0).where(norm.notna() & disc_amt.notna()))
+    return norm.round(2), purc.round(2), disc_pct.round(2), disc_amt.round(2)
+
+# Log rows for a receipt: every line shares dt, shop and basket_id. Lines
+# without any price take the item's last paid prices (last_price: item ->
+# PricePoint). Returns (rows, items that still have no price).
+def basket_entries(dt, shop, lines, last_price=None, basket_id=None):
+    lines = lines.assign(Item=lines["Item"].fillna("").astype(str).str.strip())
+    lines = lines[lines["Item"] != ""].reset_index(drop=True)
+    norm, purc = lines["NormalPrice"].astype(float), lines["PurchasePrice"].astype(float)
+    if last_price is not None:
+        missing = norm.isna() & purc.isna()
+        points = [last_price(item) for item in lines.loc[missing, "Item"]]
+        purc[missing] = [np.nan if p is None else p.PurchasePrice for p in points]
+        norm[missing] = [np.nan if p is None else p.NormalPrice for p in points]
+    norm, purc, disc_pct, disc_amt = fill_prices(norm, purc, lines["DiscountPct"], lines["DiscountAmt"])
+    priced = norm.notna() & purc.notna()
+    qty = pd.to_numeric(lines["Qty"], errors="coerce").fillna(1).clip(lower=1).astype(int)
+    rows = pd.DataFrame({
+        "DateTime": dt,
+        "Shop": shop,
+        "Item": lines["Item"],
+        "Qty": qty,
+        "NormalPrice": norm,
+        "PurchasePrice": purc,
+        "DiscountAmt": disc_amt,
+        "DiscountPct": disc_pct,
+        "TotalNormal": (norm * qty).round(2),
+        "TotalPurchase": (purc * qty).round(2),
+        "TotalDiscount": (disc_amt * qty).round(2),
+        "BasketID": basket_id or new_basket_id(),
+    })[LOG_COLUMNS]
+    return rows[priced].reset_index(drop=True), lines.loc[~priced, "Item"].tolist()
+
+def new_basket_id():
+    return uuid4().hex[:12]
+
+# One row per receipt in the log, newest first
+def baskets(df):
+    lines = df[df["BasketID"].notna()]
+    summary = lines.groupby("BasketID", sort=False).agg(
+        DateTime=("DateTime", "first"), Shop=("Shop", "first"),
+        Lines=("Item", "size"), Total=("TotalPurchase", "sum"),
+    ).reset_index()
+    summary["Total"] = summary["Total"].round(2)
+    return summary.sort_values("DateTime", ascending=False, ignore_index=True)
+
+# Log rows of one receipt
+def basket_rows(df, basket_id):
+    return df[df["BasketID"] == basket_id]
@@ -0,0 +1,231 @@
+import argparse
+import io
+import json
+import os
+import platform
+import tempfile
+from datetime import datetime
+from time import perf_counter
+import pandas as pd
+from exp_core import (
+    init_log, in_range, load_log, save_log, calculate_missing_fields,
+    get_index_label, build_labels, daily_summary,
+)
+from exp_archive import archive_log, load_manifest
+from exp_columns import column_totals, open_columns, write_columns
+from exp_query import scan
+from exp_reports import report_from_csv
+from exp_timeindex import RangeTotals
+from exp_synth import generate_log, parse_count
+
+DEFAULT_SIZES = "10k,100k,1M,10M"
+
+# Best wall time over `repeat` runs, in milliseconds
+def timed(fn, repeat=1):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = perf_counter()
+        result = fn()
+        ms = (perf_counter() - start) * 1000
+        best = ms if best is None else min(best, ms)
+    return round(best, 3), result
+
+# Same bytes st.dataframe sends to the browser (Arrow IPC), CSV if pyarrow is missing
+def serialize(df):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        buf = io.StringIO()
+        df.to_csv(buf, index=False)
+        return buf.getvalue().encode()
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(df)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+def calc_rows(df):
+    cols = ["NormalPrice", "PurchasePrice", "DiscountPct", "DiscountAmt"]
+    return [calculate_missing_fields(*row) for row in df[cols].itertuples(index=False)]
+
+# Row-by-row cases (calculate_missing_fields, apply labels) run on at most
+# `row_cap` rows; per_row_us lets them be compared across sizes
+def bench_size(rows, args):
+    df = generate_log(rows, seed=args.seed)
+    sample = df.head(args.row_cap)
+    result = {"rows": rows, "timings_ms": {}, "counts": {}}
+    t = result["timings_ms"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "log.csv")
+        t["init_log"], _ = timed(lambda: init_log(os.path.join(tmp, "new.csv")), args.repeat)
+        t["save_log"], _ = timed(lambda: save_log(df, path), args.repeat)
+        result["counts"]["csv_bytes"] = os.path.getsize(path)
+        t["load_log"], loaded = timed(lambda: load_log(path), args.repeat)
+        t["write_columns"], _ = timed(lambda: write_columns(df, path), args.repeat)
+        t["open_columns"], cols = timed(lambda: open_columns(path), args.repeat)
+        t["totals_columns"], _ = timed(lambda: column_totals(cols), args.repeat)
+        t["totals_csv"], _ = timed(lambda: load_log(path)[["TotalNormal", "TotalPurchase", "TotalDiscount"]].sum(), args.repeat)
+        month = pd.Timestamp(df["DateTime"].iloc[-1]).to_period("M").start_time
+        t["filter_load_log"], _ = timed(lambda: in_range(load_log(path), start=month).query("Shop == 'Shop 000'")[["Item", "TotalPurchase"]], args.repeat)
+        t["filter_scan"], _ = timed(lambda: scan(path).where(shop="Shop 000", start=month).select("Item", "TotalPurchase").collect(), args.repeat)
+        t["archive_log"], _ = timed(lambda: archive_log(path, keep_months=1, now=df["DateTime"].iloc[-1]), 1)
+        result["counts"]["live_bytes_after_archive"] = os.path.getsize(path)
+        result["counts"]["archive_bytes"] = sum(
+            chunk["length"] for seg in load_manifest(path)["segments"].values() for chunk in seg["chunks"])
+        t["load_log_archived"], _ = timed(lambda: load_log(path), args.repeat)
+        t["load_recent_archived"], _ = timed(lambda: load_log(path, start=month), args.repeat)
+        t["filter_scan_archived"], _ = timed(lambda: scan(path).where(shop="Shop 000", start=month).select("Item", "TotalPurchase").collect(), args.repeat)
+
+    t["calculate_missing_fields"], _ = timed(lambda: calc_rows(sample), args.repeat)
+    t["labels_apply"], _ = timed(lambda: sample.apply(get_index_label, axis=1), args.repeat)
+    t["labels_vectorized"], _ = timed(lambda: build_labels(loaded), args.repeat)
+    t["range_totals_build"], range_totals = timed(lambda: RangeTotals(loaded), args.repeat)
+    times = pd.to_datetime(loaded["DateTime"])
+    start, end = times.quantile(0.25), times.quantile(0.75)
+    t["range_total_filter_sum"], _ = timed(
+        lambda: loaded.loc[(times >= start) & (times < end), ["TotalNormal", "TotalPurchase", "TotalDiscount"]].sum(),
+        args.repeat)
+    t["range_total_prefix"], _ = timed(lambda: range_totals.total(start, end), args.repeat)
+    t["daily_summary"], pivot = timed(lambda: daily_summary(loaded), args.repeat)
+    t["serialize_log"], payload = timed(lambda: serialize(loaded), args.repeat)
+
+    result["counts"].update({
+        "row_cap_rows": len(sample),
+        "summary_rows": len(pivot),
+        "serialized_bytes": len(payload),
+    })
+    result["per_row_us"] = {
+        name: round(t[name] * 1000 / max(len(sample), 1), 3)
+        for name in ["calculate_missing_fields", "labels_apply"]
+    }
+    return result
+
+# Parallel report scaling: same synthetic CSV, 1..N worker processes
+def bench_reports(rows, args):
+    result = {"rows": rows, "timings_ms": {}, "speedup": {}}
+    workers = sorted({1, 2, 4, 8, os.cpu_count() or 1})
+    workers = [w for w in workers if w <= (os.cpu_count() or 1)] if not args.workers else \
+        [int(w) for w in args.workers.split(",")]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "log.csv")
+        save_log(generate_log(rows, seed=args.seed, days=365 * 10), path)
+        t = result["timings_ms"]
+        t["pandas_single_pass"], _ = timed(
+            lambda: load_log(path).groupby(["Shop", "Item"])["TotalPurchase"].agg(["sum", "min", "max"]),
+            args.repeat,
+        )
+        for w in workers:
+            t[f"report_{w}_workers"], _ = timed(lambda: report_from_csv(path, ("Shop", "Item"), w), args.repeat)
+        base = t[f"report_{workers[0]}_workers"]
+        result["speedup"] = {f"{w}_workers": round(base / t[f"report_{w}_workers"], 2) for w in workers}
+    return result
+
+# Same Shop/Item aggregate through pandas and DuckDB (over the CSV and over
+# an already loaded frame)
+def bench_sql(rows, args):
+    from exp_sql import connect
+    sql = ("SELECT Shop, Item, sum(TotalPurchase) AS total, min(PurchasePrice) AS low, "
+           "max(PurchasePrice) AS high FROM log GROUP BY Shop, Item")
+    result = {"rows": rows, "timings_ms": {}, "counts": {}}
+    t = result["timings_ms"]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "log.csv")
+        save_log(generate_log(rows, seed=args.seed), path)
+        t["pandas_load_groupby"], expected = timed(
+            lambda: load_log(path).groupby(["Shop", "Item"]).agg(
+                total=("TotalPurchase", "sum"), low=("PurchasePrice", "min"), high=("PurchasePrice", "max")),
+            args.repeat,
+        )
+        t["duckdb_csv"], table = timed(lambda: connect(path).execute(sql).arrow(), args.repeat)
+        df = load_log(path)
+        t["pandas_groupby_loaded"], _ = timed(
+            lambda: df.groupby(["Shop", "Item"]).agg(
+                total=("TotalPurchase", "sum"), low=("PurchasePrice", "min"), high=("PurchasePrice", "max")),
+            args.repeat,
+        )
+        con = connect(df)
+        t["duckdb_loaded"], _ = timed(lambda: con.execute(sql).arrow(), args.repeat)
+    result["counts"] = {"groups_pandas": len(expected), "groups_duckdb": len(con.execute(sql).fetchall())}
+    return result
+
+# Load + daily summary / names / labels / recent-month filter per backend
+def bench_backends(rows, args):
+    from exp_backend import get_backend
+    result = {"rows": rows, "timings_ms": {}, "counts": {}}
+    t = result["timings_ms"]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "log.csv")
+        df = generate_log(rows, seed=args.seed)
+        save_log(df, path)
+        month = pd.Timestamp(df["DateTime"].iloc[-1]).to_period("M").start_time
+        for name in ["pandas", "polars"]:
+            backend = get_backend(name)
+            t[f"{name}_summary"], summary = timed(
+                lambda: backend.to_pandas(backend.daily_summary(backend.load(path))), args.repeat)
+            t[f"{name}_names"], _ = timed(lambda: backend.names(backend.load(path), "Item"), args.repeat)
+            t[f"{name}_labels"], _ = timed(lambda: backend.labels(backend.load(path)), args.repeat)
+            t[f"{name}_recent_summary"], _ = timed(
+                lambda: backend.to_pandas(backend.daily_summary(backend.load(path, start=month))), args.repeat)
+            result["counts"][f"{name}_summary_rows"] = len(summary)
+    return result
+
+# Forecast from the (Date, Shop) rollup of a long history
+def bench_forecast(rows, args):
+    from exp_forecast import forecast_spend
+    result = {"rows": rows, "timings_ms": {}, "counts": {}}
+    t = result["timings_ms"]
+    df = generate_log(rows, seed=args.seed, days=365 * 10)
+    cols = ["TotalNormal", "TotalPurchase", "TotalDiscount"]
+
+    def build_rollup():
+        daily = df[cols].assign(Date=pd.to_datetime(df["DateTime"]).dt.date, Shop=df["Shop"], n=1)
+        grouped = daily.groupby(["Date", "Shop"])[cols + ["n"]].sum()
+        return dict(zip(grouped.index, grouped.to_numpy().tolist()))
+
+    t["rollup_build"], rollup = timed(build_rollup, 1)
+    t["forecast"], table = timed(lambda: forecast_spend(rollup), args.repeat)
+    result["counts"] = {"rollup_keys": len(rollup), "shops": len(table)}
+    return result
+
+SUITES = {"core": bench_size, "reports": bench_reports, "sql": bench_sql, "backends": bench_backends,
+          "forecast": bench_forecast}
+
+def run(args):
+    report = {
+        "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "seed": args.seed,
+        "suite": args.suite,
+        "results": [],
+    }
+    for size in args.sizes.split(","):
+        rows = parse_count(size)
+        report["results"].append(SUITES[args.suite](rows, args))
+        if args.out:
+            print(f"{rows:>10} rows done", flush=True)
+    return report
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the expense log pipeline on synthetic data")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="core")
+    parser.add_argument("--workers", help="reports suite: comma separated worker counts")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated row counts, e.g. 10k,1M")
+    parser.add_argument("--row-cap", type=int, default=100_000, help="max rows for row-by-row cases")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    return parser
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    report = run(args)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,96 @@
+import os
+import pandas as pd
+from exp_alias import normalize_keys
+from exp_names import normalize_key
+
+BUDGET_FILE = "budgets.csv"
+BUDGET_COLUMNS = ["Kind", "Name", "Monthly"]
+BUDGET_KINDS = ["Shop", "Item"]
+
+def month_of(dt):
+    return str(dt)[:7]                        # "YYYY-MM" prefix of the DateTime string
+
+# Load budget table as {"Shop": {name_key: (name, monthly)}, "Item": {...}}
+def load_budgets(path=BUDGET_FILE):
+    budgets = {kind: {} for kind in BUDGET_KINDS}
+    if not os.path.exists(path):
+        return budgets
+    df = pd.read_csv(path, dtype={"Kind": str, "Name": str}).dropna()
+    for kind, name, monthly in df[BUDGET_COLUMNS].itertuples(index=False):
+        if kind in budgets:
+            budgets[kind][normalize_key(name)] = (name.strip(), float(monthly))
+    return budgets
+
+def save_budgets(budgets, path=BUDGET_FILE):
+    rows = [
+        {"Kind": kind, "Name": name, "Monthly": monthly}
+        for kind in BUDGET_KINDS
+        for name, monthly in sorted(budgets[kind].values())
+    ]
+    pd.DataFrame(rows, columns=BUDGET_COLUMNS).to_csv(path, index=False)
+
+# Set or (amount 0) remove a monthly envelope
+def set_budget(budgets, kind, name, monthly):
+    key = normalize_key(name)
+    if monthly > 0:
+        budgets[kind][key] = (name.strip(), float(monthly))
+    else:
+        budgets[kind].pop(key, None)
+    return budgets
+
+# Running TotalPurchase per (kind, name key, month) for shops and items.
+# Built once from the log, then moved by each inserted/edited/deleted row,
+# so checking an envelope is a dict lookup.
+class MonthSpend:
+    def __init__(self, df):
+        self.totals = {}
+        if not len(df):
+            return
+        months = df["DateTime"].astype(str).str[:7]
+        spent = pd.to_numeric(df["TotalPurchase"], errors="coerce").fillna(0.0)
+        for kind in BUDGET_KINDS:
+            grouped = spent.groupby([normalize_keys(df[kind]), months]).sum()
+            self.totals.update({(kind, key, month): value for (key, month), value in grouped.items()})
+
+    def add_row(self, row, sign=1):
+        value = 0.0 if pd.isna(row["TotalPurchase"]) else float(row["TotalPurchase"])
+        month = month_of(row["DateTime"])
+        for kind in BUDGET_KINDS:
+            key = (kind, normalize_key(row[kind]), month)
+            total = self.totals.get(key, 0.0) + sign * value
+            if abs(total) < 0.005:
+                self.totals.pop(key, None)
+            else:
+                self.totals[key] = total
+
+    def spent(self, kind, name, month):
+        return self.totals.get((kind, normalize_key(name), month), 0.0)
+
+# Envelopes these entries (one entry, or a whole receipt) would push over
+# their monthly budget
+def budget_warnings(budgets, spend, entries):
+    pending = {}
+    for entry in entries:
+        month = month_of(entry["DateTime"])
+        for kind in BUDGET_KINDS:
+            budget = budgets[kind].get(normalize_key(entry[kind]))
+            if budget is not None:
+                key = (kind, budget, month)
+                pending[key] = pending.get(key, 0.0) + (entry["TotalPurchase"] or 0.0)
+    warnings = []
+    for (kind, (name, monthly), month), added in pending.items():
+        before = spend.spent(kind, name, month)
+        if before + added > monthly:
+            warnings.append({"kind": kind, "name": name, "monthly": monthly, "spent": before, "after": before + added})
+    return warnings
+
+# Every envelope with this month's spend and what is left
+def budget_status(budgets, spend, month):
+    rows = [
+        {"Kind": kind, "Name": name, "Monthly": monthly,
+         "Spent": round(spend.spent(kind, name, month), 2),
+         "Left": round(monthly - spend.spent(kind, name, month), 2)}
+        for kind in BUDGET_KINDS
+        for name, monthly in sorted(budgets[kind].values())
+    ]
+    return pd.DataFrame(rows, columns=BUDGET_COLUMNS + ["Spent", "Left"])
@@ -0,0 +1,168 @@
+import argparse
+from exp_core import LOG_FILE
+
+def cmd_serve(args):
+    from exp_api import serve
+    serve(args.host, args.port, args.log, quiet=args.quiet)
+
+def cmd_import(args):
+    import json
+    from exp_pipeline import csv_records, json_records, run_pipeline
+    from exp_store import LogStore
+    store = LogStore(args.log)
+    with open(args.file, newline="") as f:
+        is_json = args.file.endswith((".jsonl", ".ndjson", ".json"))
+        records = json_records(f) if is_json else csv_records(f)
+        result = run_pipeline(
+            store, records, queue_size=args.queue_size,
+            batch_size=args.batch_size, dedupe=not args.no_dedupe,
+        )
+    print(json.dumps(result, indent=2))
+
+def cmd_report(args):
+    import pandas as pd
+    from exp_reports import report_from_csv
+    by = tuple(key.strip() for key in args.by.split(","))
+    report = report_from_csv(args.log, by=by, workers=args.workers)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(report.to_csv(index=False) if args.csv else report.to_string(index=False))
+
+def cmd_totals(args):
+    from exp_columns import column_totals, ensure_columns
+    totals = column_totals(ensure_columns(args.log), args.start, args.end)
+    for name, value in totals.items():
+        print(f"{name:<14}{value:>14}")
+
+def cmd_query(args):
+    import pandas as pd
+    from exp_query import scan
+    query = scan(args.log).where(shop=args.shop, item=args.item, start=args.start, end=args.end)
+    if args.by:
+        query = query.group_by(*[key.strip() for key in args.by.split(",")])
+    if args.select:
+        query = query.select(*[col.strip() for col in args.select.split(",")])
+    if args.explain:
+        print(query.explain())
+        return
+    result = query.collect()
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(result.to_csv(index=False) if args.csv else result.to_string(index=False))
+
+def cmd_sql(args):
+    import sys
+    from exp_sql import connect, duckdb, query_arrow, stream
+    sql = sys.stdin.read() if args.query == "-" else args.query
+    con = connect(args.log)
+    try:
+        if args.csv:
+            for i, batch in enumerate(stream(con, sql)):
+                sys.stdout.write(batch.to_pandas().to_csv(index=False, header=i == 0))
+            return
+        table, truncated = query_arrow(con, sql, args.max_rows)
+    except (duckdb.Error, ValueError) as e:
+        sys.exit(f"sql: {e}")
+    print(table.to_pandas().to_string(index=False))
+    if truncated:
+        print(f"... first {args.max_rows} rows shown")
+
+def cmd_summary(args):
+    import pandas as pd
+    from exp_backend import get_backend
+    backend = get_backend(args.backend)
+    frame = backend.load(args.log, args.start, args.end)
+    if args.names:
+        print("\n".join(backend.names(frame, args.names)))
+        return
+    summary = backend.to_pandas(backend.daily_summary(frame))
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(summary.to_csv(index=False) if args.csv else summary.to_string(index=False))
+
+def cmd_audit(args):
+    import pandas as pd
+    from exp_core import load_log
+    from exp_prices import audit_prices
+    flagged = audit_prices(load_log(args.log), limit=args.limit)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(flagged.to_csv(index=False) if args.csv else flagged.to_string())
+    print(f"{len(flagged)} unusual prices")
+
+def cmd_archive(args):
+    from exp_archive import load_manifest
+    from exp_store import LogStore
+    moved = LogStore(args.log).archive(args.keep_months, args.codec)
+    print(f"Archived {moved} entries")
+    for month, segment in sorted(load_manifest(args.log)["segments"].items()):
+        size = sum(chunk["length"] for chunk in segment["chunks"])
+        print(f"{month}  {segment['rows']:>8} rows  {len(segment['chunks']):>4} chunks  {size:>10} bytes  {segment['codec']}")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="exp_cli", description="Expense tracker command line tools")
+    parser.add_argument("--log", default=LOG_FILE, help="log CSV to operate on")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("serve", help="run the local HTTP/JSON API")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8502)
+    p.add_argument("--quiet", action="store_true", help="don't log each request")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("import", help="bulk import a CSV or JSON-lines file through the ingestion pipeline")
+    p.add_argument("file")
+    p.add_argument("--batch-size", type=int, default=500)
+    p.add_argument("--queue-size", type=int, default=1000)
+    p.add_argument("--no-dedupe", action="store_true", help="keep entries already in the log")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("report", help="aggregate the log in parallel (sums, counts, min/max price)")
+    p.add_argument("--by", default="Shop,Item", help="group keys: Shop, Item, Year, Month, Date")
+    p.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    p.add_argument("--csv", action="store_true", help="print CSV instead of a table")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("totals", help="spend totals from the memory-mapped numeric columns")
+    p.add_argument("--start", help="first date included, e.g. 2025-01-01")
+    p.add_argument("--end", help="first date excluded")
+    p.set_defaults(func=cmd_totals)
+
+    p = sub.add_parser("query", help="filter/select/group the log, reading only what the query needs")
+    p.add_argument("--shop", action="append", help="repeat for several shops")
+    p.add_argument("--item", action="append", help="repeat for several items")
+    p.add_argument("--start", help="first date included")
+    p.add_argument("--end", help="first date excluded")
+    p.add_argument("--select", help="comma separated output columns")
+    p.add_argument("--by", help="group keys: log columns or Year, Month, Date")
+    p.add_argument("--explain", action="store_true", help="print the plan instead of running it")
+    p.add_argument("--csv", action="store_true", help="print CSV instead of a table")
+    p.set_defaults(func=cmd_query)
+
+    p = sub.add_parser("sql", help="run SQL over the log with DuckDB (the table is `log`)")
+    p.add_argument("query", help="SQL text, or - to read it from stdin")
+    p.add_argument("--max-rows", type=int, default=1000, help="rows printed as a table")
+    p.add_argument("--csv", action="store_true", help="stream every row as CSV")
+    p.set_defaults(func=cmd_sql)
+
+    p = sub.add_parser("summary", help="daily totals per shop (or distinct names) with a chosen backend")
+    p.add_argument("--backend", choices=["pandas", "polars"], help="default: $EXP_BACKEND or pandas")
+    p.add_argument("--start", help="first date included")
+    p.add_argument("--end", help="first date excluded")
+    p.add_argument("--names", choices=["Shop", "Item"], help="list distinct names instead")
+    p.add_argument("--csv", action="store_true", help="print CSV instead of a table")
+    p.set_defaults(func=cmd_summary)
+
+    p = sub.add_parser("audit", help="score every price against its item's history")
+    p.add_argument("--limit", type=float, default=4.0, help="score above which a price is reported")
+    p.add_argument("--csv", action="store_true", help="print CSV instead of a table")
+    p.set_defaults(func=cmd_audit)
+
+    p = sub.add_parser("archive", help="move old months into compressed archive segments")
+    p.add_argument("--keep-months", type=int, default=3, help="recent months kept in the live CSV")
+    p.add_argument("--codec", choices=["gzip", "zstd"], help="default: zstd if installed, else gzip")
+    p.set_defaults(func=cmd_archive)
+
+    return parser
+
+if __name__ == "__main__":
+    from exp_archive import upgrade_log
+    args = build_parser().parse_args()
+    upgrade_log(args.log)
+    args.func(args)
@@ -0,0 +1,105 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from exp_core import LOG_FILE, load_log
+
+# Fixed-width little-endian sidecar arrays, one file per column.
+# DateTime is stored as int64 nanoseconds since the epoch (NaT = int64 min).
+NAT = np.iinfo(np.int64).min
+NUMERIC_COLUMNS = {
+    "DateTime": "<i8",
+    "Qty": "<i4",
+    "NormalPrice": "<f8",
+    "PurchasePrice": "<f8",
+    "DiscountAmt": "<f8",
+    "DiscountPct": "<f8",
+    "TotalNormal": "<f8",
+    "TotalPurchase": "<f8",
+    "TotalDiscount": "<f8",
+}
+
+def sidecar_dir(path=LOG_FILE):
+    return path + ".cols"
+
+def source_key(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def column_array(df, col):
+    if col == "DateTime":
+        return pd.to_datetime(df[col], errors="coerce").to_numpy("datetime64[ns]").view("<i8")
+    values = pd.to_numeric(df[col], errors="coerce")
+    if col == "Qty":
+        values = values.fillna(0)
+    return values.to_numpy().astype(NUMERIC_COLUMNS[col])
+
+def _write_meta(path, rows):
+    meta = {"rows": rows, "source": source_key(path), "dtypes": NUMERIC_COLUMNS}
+    tmp = os.path.join(sidecar_dir(path), "meta.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(sidecar_dir(path), "meta.json"))
+
+def read_meta(path=LOG_FILE):
+    try:
+        with open(os.path.join(sidecar_dir(path), "meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# Write the sidecar for `df` (already saved to `path`); append=True adds rows
+def write_columns(df, path=LOG_FILE, append=False):
+    folder = sidecar_dir(path)
+    os.makedirs(folder, exist_ok=True)
+    meta = read_meta(path) if append else None
+    if append and meta is None:
+        return False                          # no base to append to; rebuilt on next open
+    for col, dtype in NUMERIC_COLUMNS.items():
+        with open(os.path.join(folder, f"{col}.bin"), "ab" if append else "wb") as f:
+            f.write(np.ascontiguousarray(column_array(df, col), dtype=dtype).tobytes())
+    _write_meta(path, (meta["rows"] if append else 0) + len(df))
+    return True
+
+# Memory-map the sidecar arrays. Returns None when it is missing or was
+# written for a different version of the CSV.
+def open_columns(path=LOG_FILE, columns=None):
+    meta = read_meta(path)
+    if meta is None or not os.path.exists(path) or meta["source"] != source_key(path):
+        return None
+    out = {}
+    for col in columns or NUMERIC_COLUMNS:
+        file = os.path.join(sidecar_dir(path), f"{col}.bin")
+        dtype = np.dtype(NUMERIC_COLUMNS[col])
+        if meta["rows"] == 0:
+            out[col] = np.empty(0, dtype=dtype)
+        else:
+            out[col] = np.memmap(file, dtype=dtype, mode="r", shape=(meta["rows"],))
+    return out
+
+# Open the sidecar, rebuilding it from the CSV if stale
+def ensure_columns(path=LOG_FILE, columns=None):
+    cols = open_columns(path, columns)
+    if cols is None:
+        write_columns(load_log(path), path)
+        cols = open_columns(path, columns)
+    return cols
+
+# Rows with start <= DateTime < end over a mapped DateTime array (NaT never matches)
+def time_mask(times, start=None, end=None):
+    mask = np.ones(len(times), dtype=bool)
+    if start is not None or end is not None:
+        mask &= times != NAT                   # NaT sorts below any start; never in a range
+    if start is not None:
+        mask &= times >= pd.Timestamp(start).value
+    if end is not None:
+        mask &= times < pd.Timestamp(end).value
+    return mask
+
+# Totals straight from the mapped arrays, optionally for start <= DateTime < end
+def column_totals(cols, start=None, end=None):
+    mask = time_mask(cols["DateTime"], start, end)
+    return {
+        col: round(float(np.nansum(cols[col][mask])), 2)
+        for col in ["TotalNormal", "TotalPurchase", "TotalDiscount"]
+    } | {"Entries": int(mask.sum())}
@@ -0,0 +1,145 @@
+import argparse
+import ast
+import glob
+import json
+import math
+import os
+import random
+from datetime import datetime
+from time import perf_counter
+import numpy as np
+import pandas as pd
+
+PURE_FUNCTIONS = ["to_float", "round_or_none", "calculate_missing_fields", "get_index_label"]
+HERE = os.path.dirname(os.path.abspath(__file__))
+REFERENCE = os.path.join(HERE, "exp_core.py")
+
+# Pull the pure helper functions out of an app script without running its UI
+def load_functions(path):
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    defs = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in PURE_FUNCTIONS]
+    imports = [
+        node for node in tree.body
+        if isinstance(node, ast.ImportFrom) and node.module == "exp_core"
+    ]
+    namespace = {"pd": pd, "np": np, "os": os, "math": math, "datetime": datetime}
+    module = ast.Module(body=defs, type_ignores=[])
+    exec(compile(module, path, "exec"), namespace)
+    funcs = {name: namespace[name] for name in PURE_FUNCTIONS if name in namespace}
+    # Scripts that import their helpers from exp_core are covered by the exp_core entry
+    if not funcs and imports:
+        return {}, "exp_core.py"
+    return funcs, None
+
+def discover(pattern="Expapp*.py"):
+    return [REFERENCE] + sorted(glob.glob(os.path.join(HERE, pattern)))
+
+# Same inputs for every version: form-like values plus odd ones (blank, text, negative, >100%)
+def generate_inputs(n, seed=0):
+    rng = random.Random(seed)
+    price = lambda: rng.choice([None, "", 0, 0.0, round(rng.uniform(0.5, 500), 2), rng.randint(1, 200), -5, "abc", "12.5"])
+    pct = lambda: rng.choice([None, "", 0, 0.0, round(rng.uniform(1, 60), 2), 100, 150, -10])
+    amt = lambda: rng.choice([None, "", 0, 0.0, round(rng.uniform(0.5, 50), 2), -1])
+    cases = [
+        (50, 40, 0, 0), (50, 0, 0, 0), (0, 40, 0, 0), (50, 0, 20, 0), (0, 40, 20, 0),
+        (50, 0, 0, 10), (0, 40, 0, 10), (50, 40, 20, 10), (0, 0, 0, 0), (0, 40, 100, 0),
+    ]
+    while len(cases) < n:
+        cases.append((price(), price(), pct(), amt()))
+    return cases[:n]
+
+def normalize(value):
+    if isinstance(value, tuple):
+        return tuple(normalize(v) for v in value)
+    if value is None or value == "" or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, (int, float)):
+        return round(float(value), 2)
+    return value
+
+def call(fn, args):
+    try:
+        return normalize(fn(*args))
+    except Exception as e:
+        return f"error: {type(e).__name__}"
+
+def time_calls(fn, inputs, repeat):
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        for args in inputs:
+            try:
+                fn(*args)
+            except Exception:
+                pass
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1e6 / max(len(inputs), 1), 3)
+
+def compare(args):
+    inputs = generate_inputs(args.cases, args.seed)
+    label_rows = [
+        {"DateTime": "2025-07-26 10:14:31", "Shop": "Shoprite", "Item": "Wine", "Qty": 2},
+        {"DateTime": "2025-07-26 10:03:43", "Shop": "Pick n Pay", "Item": "eggs", "Qty": 1.0},
+    ]
+    ref_funcs, _ = load_functions(args.reference)
+    ref_outputs = [call(ref_funcs["calculate_missing_fields"], a) for a in inputs]
+    ref_labels = [call(ref_funcs["get_index_label"], (row,)) for row in label_rows]
+
+    report = {
+        "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "reference": os.path.basename(args.reference),
+        "cases": len(inputs),
+        "seed": args.seed,
+        "versions": [],
+    }
+    for path in discover(args.pattern):
+        funcs, same_as = load_functions(path)
+        entry = {"version": os.path.basename(path)}
+        if same_as:
+            entry["same_as"] = same_as
+        elif "calculate_missing_fields" not in funcs:
+            entry["skipped"] = "no calculate_missing_fields"
+        else:
+            fn = funcs["calculate_missing_fields"]
+            outputs = [call(fn, a) for a in inputs]
+            diffs = [
+                {"input": list(a), "got": out, "reference": ref}
+                for a, out, ref in zip(inputs, outputs, ref_outputs) if out != ref
+            ]
+            entry.update({
+                "mismatches": len(diffs),
+                "errors": sum(isinstance(out, str) for out in outputs),
+                "examples": diffs[:args.examples],
+                "us_per_call": time_calls(fn, inputs, args.repeat),
+            })
+            if "get_index_label" in funcs:
+                labels = [call(funcs["get_index_label"], (row,)) for row in label_rows]
+                entry["label_mismatches"] = sum(a != b for a, b in zip(labels, ref_labels))
+        report["versions"].append(entry)
+    return report
+
+def print_summary(report):
+    print(f"{'version':<28}{'mismatches':>12}{'errors':>8}{'us/call':>10}")
+    for v in report["versions"]:
+        if "mismatches" in v:
+            print(f"{v['version']:<28}{v['mismatches']:>12}{v['errors']:>8}{v['us_per_call']:>10}")
+        else:
+            print(f"{v['version']:<28}  {v.get('skipped') or 'same as ' + v['same_as']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fuzz and time calculate_missing_fields across Expapp versions")
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--examples", type=int, default=5, help="example diffs kept per version")
+    parser.add_argument("--reference", default=REFERENCE)
+    parser.add_argument("--pattern", default="Expapp*.py")
+    parser.add_argument("--out", default="compare_report.json")
+    args = parser.parse_args()
+    report = compare(args)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print_summary(report)
+    print(f"Full report written to {args.out}")
@@ -0,0 +1,210 @@
+import math
+import os
+from datetime import date, datetime
+import pandas as pd
+
+LOG_FILE = "log.csv"
+
+PRICE_COLUMNS = [
+    "NormalPrice", "PurchasePrice",
+    "DiscountAmt", "DiscountPct",
+    "TotalNormal", "TotalPurchase", "TotalDiscount"
+]
+
+# BasketID ties the lines of one receipt together; empty for single entries
+LOG_COLUMNS = ["DateTime", "Shop", "Item", "Qty"] + PRICE_COLUMNS + ["BasketID"]
+LOG_DTYPES = {"BasketID": str}
+
+# Dates an entry may carry; anything outside is a typo, not a purchase
+MIN_DATE = date(1970, 1, 1)
+MAX_DATE = date(2099, 12, 31)
+MAX_AMOUNT = 1e9                     # largest price or total an entry may carry
+
+# Initialize log file
+def init_log(path=LOG_FILE):
+    if not os.path.exists(path):
+        df = pd.DataFrame(columns=LOG_COLUMNS)
+        df.to_csv(path, index=False)
+
+# Rows with start <= DateTime < end
+def in_range(df, start=None, end=None):
+    if start is None and end is None:
+        return df
+    times = pd.to_datetime(df["DateTime"], errors="coerce")
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= times >= pd.Timestamp(start)
+    if end is not None:
+        mask &= times < pd.Timestamp(end)
+    return df[mask].reset_index(drop=True)
+
+# Load log, reading through archived segments (oldest first); a range that
+# starts after the archive ends never touches it
+def load_log(path=LOG_FILE, start=None, end=None):
+    from exp_archive import read_archive
+    df = pd.read_csv(path, dtype=LOG_DTYPES) if os.path.exists(path) else pd.DataFrame(columns=LOG_COLUMNS)
+    df = in_range(df, start, end)
+    old = read_archive(path, start, end)
+    if len(old):
+        df = pd.concat([old, df], ignore_index=True) if len(df) else old
+    return df
+
+# Save log
+def save_log(df, path=LOG_FILE):
+    df.to_csv(path, index=False)
+
+# Append rows without rewriting the file
+def append_log(df, path=LOG_FILE):
+    if not os.path.exists(path):
+        save_log(df, path)
+    else:
+        df[LOG_COLUMNS].to_csv(path, mode="a", header=False, index=False)
+
+# Utility conversions
+def to_float(val, allow_zero=False):
+    try:
+        val = float(val)
+        if allow_zero:
+            return val if val >= 0 else None
+        else:
+            return val if val > 0 else None
+    except:
+        return None
+
+def round_or_none(val):
+    return round(val, 2) if val is not None else None
+
+# Fallback field calculations
+def calculate_missing_fields(norm, purc, disc_pct, disc_amt):
+    norm = to_float(norm)
+    purc = to_float(purc)
+    disc_pct = to_float(disc_pct, allow_zero=True)
+    disc_amt = to_float(disc_amt, allow_zero=True)
+
+    # Treat 0 discounts as None (meaning not provided, so calculate if needed)
+    if disc_pct == 0:
+        disc_pct = None
+    if disc_amt == 0:
+        disc_amt = None
+
+    if purc is None and norm is not None and disc_amt is not None:
+        purc = norm - disc_amt
+    if purc is None and norm is not None and disc_pct is not None:
+        purc = norm * (1 - disc_pct / 100)
+    if norm is None and purc is not None and disc_amt is not None:
+        norm = purc + disc_amt
+    if norm is None and purc is not None and disc_pct is not None:
+        norm = purc / (1 - disc_pct / 100) if disc_pct < 100 else None
+
+    # Handle cases where only one price is provided without discounts
+    if norm is None and purc is not None and disc_amt is None and disc_pct is None:
+        norm = purc
+    elif purc is None and norm is not None and disc_amt is None and disc_pct is None:
+        purc = norm
+
+    if disc_amt is None:
+        if norm is not None and purc is not None:
+            disc_amt = norm - purc
+        elif norm is not None and disc_pct is not None:
+            disc_amt = norm * (disc_pct / 100)
+    if disc_pct is None and norm is not None and disc_amt is not None:
+        disc_pct = (disc_amt / norm) * 100 if norm > 0 else 0
+
+    return round_or_none(norm), round_or_none(purc), round_or_none(disc_pct), round_or_none(disc_amt)
+
+# Label for dropdown selection
+def get_index_label(row):
+    return f"{row['DateTime']} - {row['Shop']} - {row['Item']} (x{row['Qty']})"
+
+# Vectorized version of get_index_label for the whole log
+def build_labels(df):
+    return (
+        df["DateTime"].astype(str) + " - " + df["Shop"].astype(str) + " - "
+        + df["Item"].astype(str) + " (x" + df["Qty"].astype(str) + ")"
+    )
+
+# Full log row from the form inputs
+def make_entry(dt, shop, item, qty, norm, purc, disc_pct, disc_amt, basket_id=None):
+    norm, purc, disc_pct, disc_amt = calculate_missing_fields(norm, purc, disc_pct, disc_amt)
+    return {
+        "DateTime": dt,
+        "Shop": shop,
+        "Item": item,
+        "Qty": qty,
+        "NormalPrice": norm,
+        "PurchasePrice": purc,
+        "DiscountAmt": disc_amt,
+        "DiscountPct": disc_pct,
+        "TotalNormal": round_or_none(norm * qty),
+        "TotalPurchase": round_or_none(purc * qty),
+        "TotalDiscount": round_or_none(disc_amt * qty),
+        "BasketID": basket_id,
+    }
+
+# Reject entries whose prices or totals are not sane amounts (1e308 x 10 is inf)
+def check_amounts(entry):
+    for col in PRICE_COLUMNS:
+        value = entry[col]
+        if value is not None and not pd.isna(value) and not (math.isfinite(value) and abs(value) <= MAX_AMOUNT):
+            raise ValueError(f"{col} is out of range: {value!r}")
+    return entry
+
+# Daily totals per shop
+def daily_summary(df, dates=None):
+    dates = pd.to_datetime(df["DateTime"]).dt.date if dates is None else dates
+    return df.assign(Date=dates).groupby(["Date", "Shop"]).agg({
+        "TotalNormal": "sum",
+        "TotalPurchase": "sum",
+        "TotalDiscount": "sum"
+    }).reset_index()
+
+# Log row from an external record (API/importer). Missing DateTime means now.
+def entry_from_dict(data, now=None):
+    if not isinstance(data, dict):
+        raise ValueError("entry must be an object")
+    shop = str(data.get("Shop") or "").strip()
+    item = str(data.get("Item") or "").strip()
+    if not shop or not item:
+        raise ValueError("Shop and Item name must not be blank.")
+    qty = data.get("Qty")
+    if qty is None or qty == "":
+        qty = 1
+    try:
+        number = float(qty)
+    except (TypeError, ValueError):
+        number = None
+    if number is None or not number.is_integer():
+        raise ValueError(f"Qty must be a whole number, got {qty!r}")
+    qty = int(number)
+    if qty < 1:
+        raise ValueError("Qty must be at least 1")
+    for col in ("NormalPrice", "PurchasePrice", "DiscountPct", "DiscountAmt"):
+        value = data.get(col)
+        if value is None or value == "":
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{col} must be a number, got {value!r}")
+        if not math.isfinite(number):
+            raise ValueError(f"{col} must be a finite number, got {value!r}")
+    dt = data.get("DateTime") or now or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if not isinstance(dt, (str, datetime)):
+        raise ValueError(f"DateTime must be a date/time string, got {dt!r}")
+    try:
+        stamp = pd.Timestamp(dt)
+    except (TypeError, ValueError):
+        raise ValueError(f"DateTime not understood: {dt!r}")
+    if stamp is pd.NaT or not MIN_DATE <= stamp.date() <= MAX_DATE:
+        raise ValueError(f"DateTime must be between {MIN_DATE} and {MAX_DATE}, got {dt!r}")
+    dt = stamp.strftime("%Y-%m-%d %H:%M:%S")
+    prices = calculate_missing_fields(
+        data.get("NormalPrice"), data.get("PurchasePrice"),
+        data.get("DiscountPct"), data.get("DiscountAmt"),
+    )
+    if prices[0] is None or prices[1] is None:
+        raise ValueError("NormalPrice or PurchasePrice is required")
+    basket_id = data.get("BasketID")
+    if basket_id is not None and not isinstance(basket_id, str):
+        raise ValueError(f"BasketID must be a string, got {basket_id!r}")
+    return check_amounts(make_entry(dt, shop, item, qty, *prices, basket_id=basket_id or None))
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+MAX_POINTS = 500
+BUCKET_DAYS = [1, 2, 7, 14, 30, 91, 365]
+
+# Smallest bucket (in days) that keeps a span of `days` within max_points
+def bucket_days(days, max_points=MAX_POINTS):
+    for size in BUCKET_DAYS:
+        if days / size <= max_points:
+            return size
+    return int(np.ceil(days / max_points))
+
+# Fixed time buckets over a date-indexed frame/series: sums for flows
+# (daily spend), means for levels (rolling windows). Returns (data, bucket days).
+def bucket(data, max_points=MAX_POINTS, how="sum"):
+    if len(data) <= max_points:
+        return data, 1
+    index = pd.DatetimeIndex(data.index)
+    size = bucket_days((index.max() - index.min()).days + 1, max_points)
+    resampled = data.set_axis(index).resample(f"{size}D")
+    return (resampled.sum() if how == "sum" else resampled.mean()), size
+
+# Largest-Triangle-Three-Buckets: keeps first and last points and, per
+# bucket, the point forming the largest triangle with the previous pick and
+# the next bucket's mean, so peaks and dips survive. Returns kept positions.
+def lttb(x, y, max_points=MAX_POINTS):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    keep = [0]
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        mean_x, mean_y = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        ax, ay = x[keep[-1]], y[keep[-1]]
+        area = np.abs((ax - mean_x) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (mean_y - ay))
+        keep.append(lo + int(area.argmax()))
+    keep.append(n - 1)
+    return np.array(keep)
+
+# Price points (PricePoint list) as a DateTime-indexed frame, LTTB-reduced
+def price_series(points, max_points=MAX_POINTS):
+    if not points:
+        return pd.DataFrame(columns=["PurchasePrice", "NormalPrice"])
+    df = pd.DataFrame(points)
+    df["DateTime"] = pd.to_datetime(df["DateTime"], errors="coerce")
+    df = df.dropna(subset=["DateTime"])
+    keep = lttb(df["DateTime"].to_numpy("datetime64[ns]").view("i8"), df["PurchasePrice"], max_points)
+    return df.iloc[keep].set_index("DateTime")[["PurchasePrice", "NormalPrice"]]
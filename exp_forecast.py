@@ -0,0 +1,76 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+from exp_rolling import ALL_SHOPS
+
+ALPHAS = np.linspace(0.1, 0.9, 9)     # smoothing factors tried per shop
+SEASON = 12
+SEASON_CLIP = (0.5, 2.0)
+
+# Month x shop TotalPurchase matrix (plus an all-shops column) from the
+# (Date, Shop) rollup, with empty months filled in up to `today`'s month
+def monthly_totals(rollup, today=None):
+    today = today or date.today()
+    if not rollup:
+        return pd.DataFrame(columns=[ALL_SHOPS], index=pd.PeriodIndex([], freq="M"), dtype=float)
+    keys = list(rollup)
+    frame = pd.DataFrame({
+        "Month": pd.to_datetime(pd.Series([day for day, _ in keys])).dt.to_period("M"),
+        "Shop": [str(shop) for _, shop in keys],
+        "Spent": [values[1] for values in rollup.values()],
+    })
+    table = frame.pivot_table(index="Month", columns="Shop", values="Spent", aggfunc="sum", fill_value=0.0)
+    months = pd.period_range(table.index.min(), max(table.index.max(), pd.Period(today, "M")), freq="M")
+    table = table.reindex(months, fill_value=0.0)
+    table[ALL_SHOPS] = table.sum(axis=1)
+    return table
+
+# Simple exponential smoothing over all shops at once, with alpha picked per
+# shop from ALPHAS by one-step-ahead squared error. values: (months, shops)
+def smoothed_level(values):
+    levels = np.repeat(values[:1], len(ALPHAS), axis=0)         # (alphas, shops)
+    errors = np.zeros_like(levels)
+    alphas = ALPHAS[:, None]
+    for row in values[1:]:
+        errors += (row - levels) ** 2
+        levels += alphas * (row - levels)
+    best = errors.argmin(axis=0)
+    return levels[best, np.arange(values.shape[1])]
+
+# Seasonal factor for month `t` (row index): the same month a year earlier
+# relative to the 12 months up to it; 1 until there are two years of history
+def seasonal_factor(values, t):
+    if t - SEASON < SEASON - 1 or t - SEASON >= len(values):
+        return np.ones(values.shape[1])
+    base = values[t - 2 * SEASON + 1:t - SEASON + 1].mean(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = np.where(base > 0, values[t - SEASON] / base, 1.0)
+    return np.clip(factor, *SEASON_CLIP)
+
+# This month's and next month's spend per shop. Completed months feed the
+# model; this month is what is already spent plus the forecast for the
+# days that are left.
+def forecast_spend(rollup, today=None):
+    today = today or date.today()
+    table = monthly_totals(rollup, today)
+    columns = ["LastMonth", "SpentSoFar", "ThisMonth", "NextMonth"]
+    if table.empty:
+        return pd.DataFrame(columns=columns)
+    values = table.to_numpy(dtype=float)
+    done, so_far = values[:-1], values[-1]
+    if len(done):
+        level = smoothed_level(done)
+        this_month = level * seasonal_factor(values, len(values) - 1)
+        next_month = level * seasonal_factor(values, len(values))
+        last_month = done[-1]
+    else:
+        this_month = next_month = last_month = np.zeros(values.shape[1])
+    days = pd.Period(today, "M").days_in_month
+    remaining = (days - today.day) / days
+    result = pd.DataFrame({
+        "LastMonth": last_month,
+        "SpentSoFar": so_far,
+        "ThisMonth": so_far + this_month * remaining,
+        "NextMonth": next_month,
+    }, index=pd.Index(table.columns, name="Shop")).round(2)
+    return result.sort_values("ThisMonth", ascending=False)
@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from urllib.request import Request, urlopen
+from exp_synth import generate_log
+
+ENTRY_FIELDS = ["DateTime", "Shop", "Item", "Qty", "NormalPrice", "PurchasePrice", "DiscountPct", "DiscountAmt"]
+
+def post(url, payload):
+    body = json.dumps(payload).encode()
+    request = Request(url, data=body, headers={"Content-Type": "application/json"})
+    with urlopen(request) as response:
+        return json.loads(response.read())
+
+# Fire `requests` POST /entries calls of `batch` entries each from `workers` threads
+def run(url, requests, batch, workers, seed=0):
+    entries = generate_log(requests * batch, seed=seed)[ENTRY_FIELDS].to_dict("records")
+    payloads = [entries[i * batch:(i + 1) * batch] for i in range(requests)]
+    payloads = [p[0] if batch == 1 else p for p in payloads]
+    latencies = []
+
+    def send(payload):
+        start = perf_counter()
+        post(url + "/entries", payload)
+        latencies.append(perf_counter() - start)
+
+    start = perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(send, payloads))
+    elapsed = perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "batch": batch,
+        "workers": workers,
+        "entries": requests * batch,
+        "seconds": round(elapsed, 3),
+        "entries_per_sec": round(requests * batch / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the expense API")
+    parser.add_argument("--url", help="running API, e.g. http://127.0.0.1:8502 (default: start one on a temp log)")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=1, help="entries per request")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        from exp_api import make_server
+        path = os.path.join(tempfile.mkdtemp(), "log.csv")
+        server = make_server(port=0, path=path)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}"
+    result = run(url, args.requests, args.batch, args.workers)
+    if server:
+        with server.RequestHandlerClass.store.read() as model:
+            result["rows_in_log"] = len(model.df)
+        result["write_batches"] = server.RequestHandlerClass.writer.batches
+        server.shutdown()
+    print(json.dumps(result, indent=2))
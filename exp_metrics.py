@@ -0,0 +1,59 @@
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from time import perf_counter
+import pandas as pd
+
+METRICS_FILE = "metrics.jsonl"
+
+# Per-rerun timing/count record, appended to a JSON-lines file
+class RunMetrics:
+    def __init__(self, app):
+        self.record = {
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "app": app,
+            "timings_ms": {},
+            "counts": {},
+        }
+        self.written = False
+        self._start = perf_counter()
+
+    def add_time(self, name, ms):
+        timings = self.record["timings_ms"]
+        timings[name] = round(timings.get(name, 0.0) + ms, 3)
+
+    @contextmanager
+    def timer(self, name):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, (perf_counter() - start) * 1000)
+
+    def count(self, name, value, add=False):
+        counts = self.record["counts"]
+        counts[name] = counts.get(name, 0) + value if add else value
+
+    def write(self, path=METRICS_FILE):
+        if self.written:
+            return
+        self.written = True
+        self.record["timings_ms"]["total"] = round((perf_counter() - self._start) * 1000, 3)
+        with open(path, "a") as f:
+            f.write(json.dumps(self.record) + "\n")
+
+    def frame(self):
+        timings = self.record["timings_ms"]
+        return pd.DataFrame({"Section": list(timings), "ms": list(timings.values())})
+
+def file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+# Flatten the metrics file into one row per rerun
+def load_metrics(path=METRICS_FILE):
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return pd.json_normalize(records)
@@ -0,0 +1,167 @@
+import difflib
+import heapq
+import re
+from collections import Counter, defaultdict
+
+TOP_K = 20
+
+# Normalized key used to match shop/item names ("Pick n Pay" == "pick  n pay")
+def normalize_key(name):
+    if name is None:
+        return ""
+    key = re.sub(r"[^\w\s]", " ", str(name).lower())
+    return " ".join(key.split())
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# Trie + normalized-key index over distinct names, ranked by frequency
+class NameIndex:
+    def __init__(self, top_k=TOP_K):
+        self.top_k = top_k
+        self.counts = Counter()                    # key -> number of log rows
+        self.spellings = defaultdict(Counter)      # key -> spelling -> count
+        self.grams = defaultdict(set)              # trigram -> keys
+        self.root = self._node()
+        self.total = 0
+
+    @classmethod
+    def from_series(cls, series, top_k=TOP_K):
+        index = cls(top_k)
+        for name, n in series.dropna().astype(str).value_counts().items():
+            index.add(name, int(n))
+        return index
+
+    @staticmethod
+    def _node():
+        return {"children": {}, "top": [], "end": False}
+
+    def _rank(self, key):
+        return (-self.counts[key], key)
+
+    def _path(self, key):
+        node = self.root
+        nodes = [node]
+        for ch in key:
+            node = node["children"].setdefault(ch, self._node())
+            nodes.append(node)
+        return nodes
+
+    def _find(self, prefix):
+        node = self.root
+        for ch in prefix:
+            node = node["children"].get(ch)
+            if node is None:
+                return None
+        return node
+
+    def _subtree_top(self, node, prefix, k):
+        found = []
+        stack = [(node, prefix)]
+        while stack:
+            cur, text = stack.pop()
+            if cur["end"]:
+                found.append(text)
+            for ch, child in cur["children"].items():
+                stack.append((child, text + ch))
+        return heapq.nsmallest(k, found, key=self._rank)
+
+    # Add n occurrences of a name, updating each trie node's cached top-k
+    def add(self, name, n=1):
+        self.total += n
+        key = normalize_key(name)
+        if not key:
+            return
+        self.spellings[key][str(name).strip()] += n
+        if key not in self.counts:
+            for gram in trigrams(key):
+                self.grams[gram].add(key)
+        self.counts[key] += n
+        nodes = self._path(key)
+        nodes[-1]["end"] = True
+        for node in nodes:
+            top = node["top"]
+            if key not in top:
+                top.append(key)
+            top.sort(key=self._rank)
+            del top[self.top_k:]
+
+    # Remove n occurrences of a name; cached top-k lists touching it are rebuilt
+    def remove(self, name, n=1):
+        key = normalize_key(name)
+        if key not in self.counts:
+            self.total -= n
+            return
+        n = min(n, self.counts[key])
+        self.total -= n
+        spelling = str(name).strip()
+        self.spellings[key][spelling] -= n
+        if self.spellings[key][spelling] <= 0:
+            del self.spellings[key][spelling]
+        self.counts[key] -= n
+        if self.counts[key] <= 0:
+            del self.counts[key]
+            del self.spellings[key]
+            for gram in trigrams(key):
+                self.grams[gram].discard(key)
+        nodes = self._path(key)
+        nodes[-1]["end"] = key in self.counts
+        for depth, node in enumerate(nodes):
+            if key in node["top"]:
+                node["top"] = self._subtree_top(node, key[:depth], self.top_k)
+
+    def display(self, key):
+        spellings = self.spellings.get(key)
+        return spellings.most_common(1)[0][0] if spellings else key
+
+    # Existing spelling for a name that only differs in case/spacing/punctuation
+    def resolve(self, name):
+        key = normalize_key(name)
+        return self.display(key) if key in self.counts else str(name).strip()
+
+    def __contains__(self, name):
+        return normalize_key(name) in self.counts
+
+    def __len__(self):
+        return len(self.counts)
+
+    def top(self, k=TOP_K):
+        keys = self.root["top"][:k] if k <= self.top_k else heapq.nsmallest(k, self.counts, key=self._rank)
+        return [self.display(key) for key in keys]
+
+    def prefix(self, text, k=TOP_K):
+        key = normalize_key(text)
+        node = self._find(key)
+        if node is None:
+            return []
+        keys = node["top"][:k] if k <= self.top_k else self._subtree_top(node, key, k)
+        return [self.display(key) for key in keys]
+
+    # Typo-tolerant matches: trigram candidates, then similarity weighted by frequency
+    def fuzzy(self, text, k=TOP_K, cutoff=0.75, max_candidates=200):
+        key = normalize_key(text)
+        if not key:
+            return []
+        shared = Counter()
+        for gram in trigrams(key):
+            for cand in self.grams.get(gram, ()):
+                shared[cand] += 1
+        scored = []
+        for cand, _ in shared.most_common(max_candidates):
+            ratio = difflib.SequenceMatcher(None, key, cand).ratio()
+            if ratio >= cutoff:
+                scored.append((-ratio, -self.counts[cand], cand))
+        return [self.display(cand) for _, _, cand in heapq.nsmallest(k, scored)]
+
+    # Prefix matches first, topped up with fuzzy matches
+    def suggest(self, text, k=TOP_K):
+        if not normalize_key(text):
+            return self.top(k)
+        out = self.prefix(text, k)
+        for name in self.fuzzy(text, k):
+            if len(out) >= k:
+                break
+            if name not in out:
+                out.append(name)
+        return out
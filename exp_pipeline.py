@@ -0,0 +1,160 @@
+import asyncio
+import csv
+import io
+import json
+from time import perf_counter
+from exp_alias import canonical_name, load_aliases
+from exp_core import entry_from_dict
+
+QUEUE_SIZE = 1000
+BATCH_SIZE = 500
+MAX_DELAY = 0.05
+DONE = object()
+
+def dedupe_key(dt, shop, item, qty, purc):
+    return (str(dt), str(shop), str(item), int(qty), round(float(purc), 2))
+
+# CSV text/file -> dict records, JSON lines -> dict records
+def csv_records(lines):
+    return csv.DictReader(lines)
+
+def json_records(lines):
+    return (line for line in lines if line.strip())
+
+def records_from_text(text, content_type="text/csv"):
+    lines = io.StringIO(text)
+    return json_records(lines) if "json" in content_type else csv_records(lines)
+
+# parse -> validate/infer -> dedupe -> batch write, joined by bounded queues.
+# A slow write stage fills the queues and blocks the earlier stages instead
+# of letting parsed records pile up in memory.
+class Pipeline:
+    def __init__(self, store, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE,
+                 max_delay=MAX_DELAY, dedupe=True):
+        self.store = store
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.dedupe = dedupe
+        self.aliases = load_aliases()
+        self.errors = []
+        self.metrics = {
+            "read": 0, "parsed": 0, "valid": 0, "invalid": 0,
+            "duplicates": 0, "written": 0, "batches": 0,
+            "max_queue_depth": {}, "write_seconds": 0.0,
+        }
+
+    def _depth(self, name, q):
+        depths = self.metrics["max_queue_depth"]
+        depths[name] = max(depths.get(name, 0), q.qsize())
+
+    async def _put(self, name, q, value):
+        await q.put(value)
+        self._depth(name, q)
+
+    async def _source(self, records, out):
+        if hasattr(records, "__aiter__"):
+            async for record in records:
+                self.metrics["read"] += 1
+                await self._put("parse", out, record)
+        else:
+            for record in records:
+                self.metrics["read"] += 1
+                await self._put("parse", out, record)
+        await out.put(DONE)
+
+    async def _parse(self, inq, out):
+        line = 0
+        while (record := await inq.get()) is not DONE:
+            line += 1
+            try:
+                record = json.loads(record) if isinstance(record, (str, bytes)) else dict(record)
+            except json.JSONDecodeError as e:
+                self._error(line, f"invalid JSON: {e}")
+                continue
+            except (TypeError, ValueError) as e:
+                self._error(line, f"invalid record: {e}")
+                continue
+            self.metrics["parsed"] += 1
+            await self._put("validate", out, (line, record))
+        await out.put(DONE)
+
+    async def _validate(self, inq, out):
+        while (job := await inq.get()) is not DONE:
+            line, record = job
+            try:
+                entry = entry_from_dict(record)
+            except (TypeError, ValueError) as e:
+                self._error(line, str(e))
+                continue
+            entry["Shop"] = canonical_name(self.aliases, "Shop", entry["Shop"])
+            entry["Item"] = canonical_name(self.aliases, "Item", entry["Item"])
+            self.metrics["valid"] += 1
+            await self._put("dedupe", out, entry)
+        await out.put(DONE)
+
+    async def _dedupe(self, inq, out):
+        seen = set()
+        if self.dedupe:
+            cols = ["DateTime", "Shop", "Item", "Qty", "PurchasePrice"]
+            with self.store.read() as model:
+                existing = model.df[cols].dropna()
+            seen = {dedupe_key(*row) for row in existing.itertuples(index=False)}
+        while (entry := await inq.get()) is not DONE:
+            if self.dedupe:
+                key = dedupe_key(entry["DateTime"], entry["Shop"], entry["Item"],
+                                 entry["Qty"], entry["PurchasePrice"])
+                if key in seen:
+                    self.metrics["duplicates"] += 1
+                    continue
+                seen.add(key)
+            await self._put("write", out, entry)
+        await out.put(DONE)
+
+    async def _write(self, inq):
+        loop = asyncio.get_running_loop()
+        done = False
+        while not done:
+            batch = []
+            entry = await inq.get()
+            deadline = loop.time() + self.max_delay
+            while entry is not DONE:
+                batch.append(entry)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    entry = await asyncio.wait_for(inq.get(), max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    break
+            done = entry is DONE
+            if batch:
+                start = perf_counter()
+                # Disk write runs in a thread; the queues fill up meanwhile
+                await loop.run_in_executor(None, self.store.insert_many, batch)
+                self.metrics["write_seconds"] += perf_counter() - start
+                self.metrics["written"] += len(batch)
+                self.metrics["batches"] += 1
+
+    def _error(self, line, message):
+        self.metrics["invalid"] += 1
+        if len(self.errors) < 100:
+            self.errors.append({"record": line, "error": message})
+
+    async def run(self, records):
+        queues = [asyncio.Queue(self.queue_size) for _ in range(4)]
+        start = perf_counter()
+        await asyncio.gather(
+            self._source(records, queues[0]),
+            self._parse(queues[0], queues[1]),
+            self._validate(queues[1], queues[2]),
+            self._dedupe(queues[2], queues[3]),
+            self._write(queues[3]),
+        )
+        elapsed = perf_counter() - start
+        self.metrics["seconds"] = round(elapsed, 3)
+        self.metrics["write_seconds"] = round(self.metrics["write_seconds"], 3)
+        self.metrics["entries_per_sec"] = round(self.metrics["written"] / elapsed, 1) if elapsed else 0.0
+        return {"metrics": self.metrics, "errors": self.errors}
+
+def run_pipeline(store, records, **options):
+    return asyncio.run(Pipeline(store, **options).run(records))
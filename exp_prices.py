@@ -0,0 +1,135 @@
+from bisect import bisect_left, insort
+from collections import defaultdict, namedtuple
+import numpy as np
+import pandas as pd
+from exp_alias import normalize_keys
+from exp_names import normalize_key
+
+PricePoint = namedtuple("PricePoint", ["DateTime", "Shop", "PurchasePrice", "NormalPrice"])
+
+MIN_HISTORY = 3           # prices needed before an item's prices are judged
+SCORE_LIMIT = 4.0         # deviations from the item's mean that count as anomalous
+STD_FLOOR = 0.1           # std never taken below 10% of the mean (steady prices)
+
+def anomaly_score(price, mean, std):
+    return abs(price - mean) / max(std, STD_FLOOR * abs(mean), 0.01)
+
+# Per-item price history: item key -> points ordered by time and by price
+class PriceHistory:
+    def __init__(self):
+        self.by_time = defaultdict(list)
+        self.by_price = defaultdict(list)
+        self.moments = {}                       # key -> [n, mean, M2] (Welford)
+        self.total = 0
+
+    @classmethod
+    def from_df(cls, df):
+        index = cls()
+        cols = ["DateTime", "Shop", "Item", "PurchasePrice", "NormalPrice"]
+        for dt, shop, item, purc, norm in df[cols].itertuples(index=False):
+            index.add(dt, shop, item, purc, norm)
+        return index
+
+    @staticmethod
+    def _point(dt, shop, purc, norm):
+        if pd.isna(purc):
+            return None
+        return PricePoint(str(dt), str(shop), float(purc), float(purc) if pd.isna(norm) else float(norm))
+
+    @staticmethod
+    def _price_key(point):
+        return (point.PurchasePrice, point.DateTime, point.Shop, point.NormalPrice)
+
+    def add(self, dt, shop, item, purc, norm):
+        self.total += 1
+        point = self._point(dt, shop, purc, norm)
+        key = normalize_key(item)
+        if point is None or not key:
+            return
+        insort(self.by_time[key], point)
+        insort(self.by_price[key], self._price_key(point))
+        moments = self.moments.setdefault(key, [0, 0.0, 0.0])
+        moments[0] += 1
+        delta = point.PurchasePrice - moments[1]
+        moments[1] += delta / moments[0]
+        moments[2] += delta * (point.PurchasePrice - moments[1])
+
+    def remove(self, dt, shop, item, purc, norm):
+        self.total -= 1
+        point = self._point(dt, shop, purc, norm)
+        key = normalize_key(item)
+        if point is None or key not in self.by_time:
+            return
+        for points, value in ((self.by_time[key], point), (self.by_price[key], self._price_key(point))):
+            pos = bisect_left(points, value)
+            if pos < len(points) and points[pos] == value:
+                del points[pos]
+        moments = self.moments.get(key)
+        if moments and moments[0] > 1:
+            moments[0] -= 1
+            delta = point.PurchasePrice - moments[1]
+            moments[1] -= delta / moments[0]
+            moments[2] = max(moments[2] - delta * (point.PurchasePrice - moments[1]), 0.0)
+        if not self.by_time[key]:
+            del self.by_time[key]
+            del self.by_price[key]
+            self.moments.pop(key, None)
+
+    def add_row(self, row):
+        self.add(row["DateTime"], row["Shop"], row["Item"], row["PurchasePrice"], row["NormalPrice"])
+
+    def remove_row(self, row):
+        self.remove(row["DateTime"], row["Shop"], row["Item"], row["PurchasePrice"], row["NormalPrice"])
+
+    def history(self, item):
+        return list(self.by_time.get(normalize_key(item), []))
+
+    def last(self, item):
+        points = self.by_time.get(normalize_key(item))
+        return points[-1] if points else None
+
+    def best(self, item):
+        prices = self.by_price.get(normalize_key(item))
+        if not prices:
+            return None
+        purc, dt, shop, norm = prices[0]
+        return PricePoint(dt, shop, purc, norm)
+
+
+    # Running statistics of an item's purchase prices, O(1)
+    def stats(self, item):
+        key = normalize_key(item)
+        moments = self.moments.get(key)
+        if not moments:
+            return None
+        n, mean, m2 = moments
+        prices = self.by_price[key]
+        return {
+            "n": n, "mean": mean, "std": (m2 / (n - 1)) ** 0.5 if n > 1 else 0.0,
+            "min": prices[0][0], "max": prices[-1][0], "last": self.by_time[key][-1].PurchasePrice,
+        }
+
+    # Stats plus score when `price` is far off the item's history, else None
+    def check(self, item, price):
+        stats = self.stats(item)
+        if stats is None or stats["n"] < MIN_HISTORY or price is None or pd.isna(price):
+            return None
+        score = anomaly_score(float(price), stats["mean"], stats["std"])
+        return stats | {"price": float(price), "score": score} if score > SCORE_LIMIT else None
+
+# Score every row of the log against the rest of its item's history at once
+# (leave-one-out mean/std from per-item sums); rows over `limit`, worst first
+def audit_prices(df, limit=SCORE_LIMIT, min_history=MIN_HISTORY):
+    keys = normalize_keys(df["Item"])
+    price = pd.to_numeric(df["PurchasePrice"], errors="coerce")
+    groups = price.groupby(keys)
+    others = groups.transform("count") - 1
+    mean = (groups.transform("sum") - price) / others
+    sq = (price ** 2).groupby(keys).transform("sum") - price ** 2
+    var = (sq - others * mean ** 2) / (others - 1)
+    std = np.sqrt(var.clip(lower=0))
+    floor = np.maximum(STD_FLOOR * mean.abs(), 0.01)
+    score = (price - mean).abs() / np.maximum(std, floor)
+    score = score.where((others >= min_history) & price.notna())
+    out = df.assign(ItemMean=mean.round(2), ItemStd=std.round(2), Score=score.round(2))
+    return out[out["Score"] > limit].sort_values("Score", ascending=False)
@@ -0,0 +1,180 @@
+import copy
+import os
+import numpy as np
+import pandas as pd
+from exp_archive import archive_chunks, archived_rows, load_manifest, read_chunk
+from exp_columns import NUMERIC_COLUMNS, open_columns, time_mask
+from exp_core import LOG_COLUMNS, LOG_DTYPES, LOG_FILE, in_range
+from exp_reports import MERGE_AGG, SUM_COLUMNS, TIME_KEYS, merge_partials, partial_aggregate
+
+def _narrow(current, values):
+    values = {values} if isinstance(values, str) else set(values)
+    return values if current is None else current & values
+
+# Lazy query over the log (archive segments + live CSV + numeric sidecar).
+# where/select/group_by only build the plan; collect() runs it, reading just
+# the chunks, rows and columns the plan needs:
+#   scan().where(shop="Clicks", date_between=("2025-01-01", "2025-02-01"))
+#         .select("Item", "TotalPurchase").collect()
+class Query:
+    def __init__(self, path=LOG_FILE):
+        self.path = path
+        self.start = None
+        self.end = None
+        self.shops = None
+        self.items = None
+        self.columns = None
+        self.keys = None
+
+    def _copy(self, **changes):
+        query = copy.copy(self)
+        query.__dict__.update(changes)
+        return query
+
+    # Filters combine with earlier ones (AND); dates are start <= DateTime < end
+    def where(self, shop=None, item=None, date_between=None, start=None, end=None):
+        if date_between is not None:
+            start, end = date_between
+        query = self._copy()
+        if start is not None:
+            start = pd.Timestamp(start)
+            query.start = start if query.start is None else max(query.start, start)
+        if end is not None:
+            end = pd.Timestamp(end)
+            query.end = end if query.end is None else min(query.end, end)
+        if shop is not None:
+            query.shops = _narrow(query.shops, shop)
+        if item is not None:
+            query.items = _narrow(query.items, item)
+        return query
+
+    def select(self, *columns):
+        return self._copy(columns=list(columns))
+
+    # Keys: log columns or Year/Month/Date; output as in exp_reports
+    def group_by(self, *keys):
+        unknown = [key for key in keys if key not in LOG_COLUMNS and key not in TIME_KEYS]
+        if unknown:
+            raise ValueError(f"unknown group keys: {unknown}")
+        return self._copy(keys=list(keys))
+
+    def output_columns(self):
+        if self.keys is not None:
+            return self.columns or self.keys + list(MERGE_AGG)
+        return self.columns or LOG_COLUMNS
+
+    # Columns that have to be read to answer the query
+    def needed_columns(self):
+        if self.keys is None:
+            cols = set(self.output_columns())
+        else:
+            cols = {key for key in self.keys if key not in TIME_KEYS} | set(SUM_COLUMNS) | {"PurchasePrice"}
+            if any(key in TIME_KEYS for key in self.keys):
+                cols.add("DateTime")
+        if self.start is not None or self.end is not None:
+            cols.add("DateTime")
+        if self.shops is not None:
+            cols.add("Shop")
+        if self.items is not None:
+            cols.add("Item")
+        return [col for col in LOG_COLUMNS if col in cols]
+
+    def _check_columns(self):
+        valid = LOG_COLUMNS if self.keys is None else self.keys + list(MERGE_AGG)
+        unknown = [col for col in self.output_columns() if col not in valid]
+        if unknown:
+            raise ValueError(f"unknown columns: {unknown}")
+
+    # Decide what to read: the mapped numeric columns alone when they cover
+    # the query, else the overlapping archive chunks plus the live CSV, with
+    # the live rows narrowed to a contiguous window through the sidecar times.
+    def plan(self):
+        self._check_columns()
+        needed = self.needed_columns()
+        plan = {"columns": needed}
+        output = set(self.output_columns())
+        if self.keys is None and self.shops is None and self.items is None \
+                and set(needed) <= set(NUMERIC_COLUMNS) and "DateTime" not in output:
+            mapped = open_columns(self.path, needed)
+            if mapped is not None:
+                plan.update(source="columns", mapped=mapped)
+                return plan
+        segments = load_manifest(self.path)["segments"]
+        plan["source"] = "files"
+        plan["chunks"] = archive_chunks(self.path, self.start, self.end)
+        plan["total_chunks"] = sum(len(segment["chunks"]) for segment in segments.values())
+        plan["live"] = self._live_window()
+        return plan
+
+    # None: read every live row; (first, count): just that window of rows
+    def _live_window(self):
+        if self.start is None and self.end is None:
+            return None
+        mapped = open_columns(self.path, ["DateTime"])
+        if mapped is None:
+            return None
+        times = mapped["DateTime"][archived_rows(self.path):]
+        hits = np.flatnonzero(time_mask(times, self.start, self.end))
+        if not len(hits):
+            return (0, 0)
+        first, last = int(hits[0]), int(hits[-1])
+        return (first, last - first + 1)
+
+    def explain(self):
+        plan = self.plan()
+        lines = [f"scan {self.path}"]
+        if self.start is not None or self.end is not None:
+            lines.append(f"  filter DateTime in [{self.start}, {self.end})")
+        if self.shops is not None:
+            lines.append(f"  filter Shop in {sorted(self.shops)}")
+        if self.items is not None:
+            lines.append(f"  filter Item in {sorted(self.items)}")
+        lines.append(f"  read columns {plan['columns']}")
+        if plan["source"] == "columns":
+            lines.append("  source: memory-mapped numeric columns")
+        else:
+            lines.append(f"  archive: {len(plan['chunks'])}/{plan['total_chunks']} chunks")
+            live = plan["live"]
+            lines.append("  live: all rows" if live is None else f"  live: rows {live[0]}..{live[0] + live[1]}")
+        if self.keys is not None:
+            lines.append(f"  group by {self.keys}")
+        return "\n".join(lines)
+
+    # Filter one piece as soon as it is read, then project or pre-aggregate it
+    def _finish(self, df):
+        df = in_range(df, self.start, self.end)
+        if self.shops is not None:
+            df = df[df["Shop"].isin(self.shops)]
+        if self.items is not None:
+            df = df[df["Item"].isin(self.items)]
+        if self.keys is not None:
+            return partial_aggregate(df, self.keys)
+        return df[self.output_columns()]
+
+    def collect(self):
+        plan = self.plan()
+        columns = self.output_columns()
+        if plan["source"] == "columns":
+            mapped = plan["mapped"]
+            mask = time_mask(mapped["DateTime"], self.start, self.end) if "DateTime" in mapped else slice(None)
+            return pd.DataFrame({col: np.asarray(mapped[col][mask]) for col in columns})
+        needed = plan["columns"]
+        parts = [self._finish(read_chunk(self.path, segment, chunk, needed))
+                 for segment, chunk in plan["chunks"]]
+        live = plan["live"]
+        if os.path.exists(self.path) and live != (0, 0):
+            if live is None:
+                df = pd.read_csv(self.path, usecols=needed, dtype=LOG_DTYPES)
+            else:
+                df = pd.read_csv(self.path, usecols=needed, dtype=LOG_DTYPES,
+                                 skiprows=range(1, live[0] + 1), nrows=live[1])
+            parts.append(self._finish(df))
+        if self.keys is not None:
+            return merge_partials(parts, self.keys)[columns]
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(parts, ignore_index=True)
+
+def scan(path=LOG_FILE):
+    return Query(path)
@@ -0,0 +1,73 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from exp_archive import load_manifest, read_chunk
+from exp_core import LOG_COLUMNS, LOG_DTYPES, LOG_FILE
+
+SUM_COLUMNS = ["TotalNormal", "TotalPurchase", "TotalDiscount", "Qty"]
+TIME_KEYS = {"Year": 4, "Month": 7, "Date": 10}     # DateTime string prefix lengths
+MERGE_AGG = {
+    **{col: "sum" for col in SUM_COLUMNS},
+    "Entries": "sum", "MinPrice": "min", "MaxPrice": "max",
+}
+
+# Partial aggregate of one chunk: sums, counts and min/max price per group
+def partial_aggregate(df, by):
+    df = df.copy()
+    for key in by:
+        if key in TIME_KEYS:
+            df[key] = df["DateTime"].astype(str).str[:TIME_KEYS[key]]
+    df = df.assign(Entries=1, MinPrice=df["PurchasePrice"], MaxPrice=df["PurchasePrice"])
+    return df.groupby(list(by), sort=False).agg(MERGE_AGG)
+
+def merge_partials(partials, by):
+    partials = [p for p in partials if len(p)]
+    if not partials:
+        return pd.DataFrame(columns=list(by) + list(MERGE_AGG))
+    merged = pd.concat(partials).groupby(level=list(range(len(by)))).agg(MERGE_AGG)
+    merged[SUM_COLUMNS] = merged[SUM_COLUMNS].round(2)
+    return merged.reset_index()
+
+# Newline-aligned byte ranges covering the file's data rows
+def byte_ranges(path, parts):
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        start = f.tell()
+        bounds = [start]
+        for i in range(1, parts):
+            f.seek(max(start + (size - start) * i // parts, bounds[-1]))
+            f.readline()
+            bounds.append(f.tell())
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+# Worker: parse its own slice of the CSV and aggregate it
+def aggregate_range(path, start, end, by):
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    df = pd.read_csv(io.BytesIO(data), header=None, names=LOG_COLUMNS, dtype=LOG_DTYPES,
+                     usecols=["DateTime", "Shop", "Item", "Qty", "PurchasePrice",
+                              "TotalNormal", "TotalPurchase", "TotalDiscount"])
+    return partial_aggregate(df, by)
+
+# Worker: inflate one archived chunk and aggregate it
+def aggregate_chunk(path, segment, chunk, by):
+    return partial_aggregate(read_chunk(path, segment, chunk), by)
+
+# Report over a log CSV, parsed and aggregated in parallel by byte range;
+# each archived chunk is one more task
+def report_from_csv(path=LOG_FILE, by=("Shop", "Item"), workers=None, parts=None):
+    workers = workers or os.cpu_count() or 1
+    tasks = [(aggregate_range, path, a, b, by) for a, b in byte_ranges(path, parts or workers * 4)]
+    tasks += [(aggregate_chunk, path, segment, chunk, by)
+              for segment in load_manifest(path)["segments"].values() for chunk in segment["chunks"]]
+    if workers == 1:
+        partials = [fn(*args) for fn, *args in tasks]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(fn, *args) for fn, *args in tasks]
+            partials = [future.result() for future in futures]
+    return merge_partials(partials, by)
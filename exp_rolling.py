@@ -0,0 +1,60 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+
+WINDOWS = [7, 30, 90]
+SPAN_DAYS = 730                                            # days of history the view keeps
+METRICS = ["Spent", "Saved", "Entries"]
+ROLLUP_FIELDS = {"Spent": 1, "Saved": 2, "Entries": 3}     # positions in LogModel.rollup values
+ALL_SHOPS = "All shops"
+
+# Rolling 7/30/90-day spend, savings and entry counts per shop, from the
+# (Date, Shop) rollup: the rollup is laid out as a dense day x shop grid,
+# cumulated once along days, and every window is one vectorized difference
+# of the cumulative grid. Cost depends on days x shops, not on entries.
+# The grid covers only the last span days (plus the longest window before
+# them), so one stray old or future date cannot blow it up.
+class RollingView:
+    def __init__(self, rollup, windows=WINDOWS, end=None, span=SPAN_DAYS):
+        self.windows = list(windows)
+        keys = list(rollup)
+        if not keys:
+            self.dates = pd.DatetimeIndex([])
+            self.shops = []
+            self.values = {w: np.zeros((0, 1, len(METRICS))) for w in self.windows}
+            return
+        days = pd.to_datetime(pd.Series([day for day, _ in keys])).to_numpy("datetime64[D]")
+        shop_pos, shops = pd.factorize(pd.Series([shop for _, shop in keys], dtype=str), sort=True)
+        fields = np.array(list(rollup.values()), dtype=float)[:, [ROLLUP_FIELDS[m] for m in METRICS]]
+        last = np.datetime64(end or date.today(), "D")
+        first = min(max(days.min(), last - (span + max(self.windows) - 2)), last)
+        shown = min(span, (last - first).astype(int) + 1)
+        inside = (days >= first) & (days <= last)
+        grid = np.zeros(((last - first).astype(int) + 1, len(shops) + 1, len(METRICS)))
+        np.add.at(grid, ((days[inside] - first).astype(int), shop_pos[inside]), fields[inside])
+        grid[:, -1] = grid[:, :-1].sum(axis=1)
+        cum = np.concatenate([np.zeros((1,) + grid.shape[1:]), grid.cumsum(axis=0)])
+        ends = np.arange(len(grid) - shown + 1, len(grid) + 1)
+        self.dates = pd.date_range(end=pd.Timestamp(last), periods=shown, freq="D")
+        self.shops = list(shops) + [ALL_SHOPS]
+        self.values = {w: cum[ends] - cum[np.maximum(ends - w, 0)] for w in self.windows}
+
+    # Date x shop frame of one metric over one window
+    def frame(self, window, metric="Spent"):
+        values = self.values[window][:, :, METRICS.index(metric)]
+        df = pd.DataFrame(values, index=self.dates, columns=self.shops or [ALL_SHOPS])
+        return df.round(2) if metric != "Entries" else df.astype(int)
+
+    # Latest value of every window and metric for one shop
+    def latest(self, shop=ALL_SHOPS):
+        if not len(self.dates):
+            return {(w, m): 0 for w in self.windows for m in METRICS}
+        col = self.shops.index(shop)
+        return {(w, m): self.values[w][-1, col, i] for w in self.windows for i, m in enumerate(METRICS)}
+
+    # Shops by spend over the longest window, biggest first
+    def top_shops(self, n=5):
+        if not len(self.dates):
+            return []
+        spent = self.values[max(self.windows)][-1, :-1, 0]
+        return [self.shops[i] for i in np.argsort(-spent, kind="stable")[:n]]
@@ -0,0 +1,98 @@
+import os
+import pandas as pd
+from exp_archive import archive_dir, load_manifest
+from exp_core import LOG_FILE
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+BATCH_ROWS = 10_000
+DEFAULT_SQL = """SELECT Shop, count(*) AS Entries, round(sum(TotalPurchase), 2) AS Spent
+FROM log
+GROUP BY Shop
+ORDER BY Spent DESC"""
+
+SQL_TYPES = {
+    "DateTime": "TIMESTAMP", "Shop": "VARCHAR", "Item": "VARCHAR", "Qty": "INTEGER",
+    "NormalPrice": "DOUBLE", "PurchasePrice": "DOUBLE", "DiscountAmt": "DOUBLE",
+    "DiscountPct": "DOUBLE", "TotalNormal": "DOUBLE", "TotalPurchase": "DOUBLE",
+    "TotalDiscount": "DOUBLE", "BasketID": "VARCHAR",
+}
+
+def available():
+    return duckdb is not None
+
+def require():
+    if duckdb is None:
+        raise RuntimeError("SQL mode needs the duckdb package (pip install duckdb)")
+
+def _quote(text):
+    return "'" + str(text).replace("'", "''") + "'"
+
+def _read_csv(files, header, compression="auto"):
+    columns = "{" + ", ".join(f"{_quote(col)}: {_quote(kind)}" for col, kind in SQL_TYPES.items()) + "}"
+    file_list = "[" + ", ".join(_quote(file) for file in files) + "]"
+    return (f"SELECT * FROM read_csv({file_list}, header={str(header).lower()}, "
+            f"columns={columns}, compression={_quote(compression)})")
+
+# View `log` over the live CSV plus the archive segments (DuckDB reads the
+# gzip/zstd chunk runs directly), so queries always see the full history
+def register_path(con, path=LOG_FILE):
+    parts = []
+    segments = sorted(load_manifest(path)["segments"].values(), key=lambda seg: seg["start"])
+    for codec in ("gzip", "zstd"):
+        files = [os.path.join(archive_dir(path), seg["file"]) for seg in segments if seg["codec"] == codec]
+        if files:
+            parts.append(_read_csv(files, header=False, compression=codec))
+    if os.path.exists(path):
+        parts.append(_read_csv([path], header=True))
+    if not parts:
+        columns = ", ".join(f"NULL::{kind} AS {col}" for col, kind in SQL_TYPES.items())
+        parts.append(f"SELECT {columns} WHERE false")
+    con.execute("CREATE OR REPLACE VIEW log AS " + " UNION ALL ".join(parts))
+
+# Register an in-memory log frame as `log`; DuckDB scans the pandas columns
+# in place, only DateTime is converted to timestamps first
+def register_df(con, df):
+    frame = df.assign(DateTime=pd.to_datetime(df["DateTime"], errors="coerce"))
+    con.register("log", frame)
+
+# Connection with `log` registered from a path or a DataFrame. `sandbox`
+# turns off file access afterwards, so console SQL can only see the log.
+def connect(source=LOG_FILE, sandbox=False):
+    require()
+    con = duckdb.connect()
+    if isinstance(source, pd.DataFrame):
+        register_df(con, source)
+    else:
+        register_path(con, source)
+    if sandbox:
+        con.execute("SET enable_external_access = false")
+        con.execute("SET lock_configuration = true")
+    return con
+
+# Result as an Arrow RecordBatchReader (batches are produced as they are read).
+# Blank or comment-only SQL has no statement to run and raises ValueError.
+def stream(con, sql, batch_rows=BATCH_ROWS):
+    result = con.execute(sql)
+    if result is None:
+        raise ValueError("no SQL statement to run")
+    if hasattr(result, "to_arrow_reader"):
+        return result.to_arrow_reader(batch_rows)
+    return result.fetch_record_batch(batch_rows)
+
+# First `max_rows` rows as an Arrow table; True as second value if cut short
+def query_arrow(con, sql, max_rows=None):
+    import pyarrow as pa
+    reader = stream(con, sql)
+    batches, rows, truncated = [], 0, False
+    for batch in reader:
+        if max_rows is not None and rows + batch.num_rows > max_rows:
+            batches.append(batch.slice(0, max_rows - rows))
+            truncated = True
+            break
+        batches.append(batch)
+        rows += batch.num_rows
+    return pa.Table.from_batches(batches, schema=reader.schema), truncated
@@ -0,0 +1,321 @@
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date
+import pandas as pd
+from exp_core import LOG_COLUMNS, LOG_FILE, PRICE_COLUMNS, init_log, save_log, append_log, build_labels
+from exp_alias import canonicalize
+from exp_archive import KEEP_MONTHS, archive_dir, archive_log, archived_rows, month_keys, upgrade_log, write_segments
+from exp_backend import get_backend
+from exp_budget import MonthSpend
+from exp_columns import read_meta, source_key, write_columns
+from exp_forecast import forecast_spend
+from exp_names import NameIndex
+from exp_prices import PriceHistory
+from exp_rolling import RollingView
+from exp_timeindex import RangeTotals, TimeIndex
+
+try:
+    import fcntl
+except ImportError:                  # no cross-process locking off POSIX
+    fcntl = None
+
+ROLLUP_COLUMNS = ["TotalNormal", "TotalPurchase", "TotalDiscount"]
+
+def to_date(value):
+    ts = pd.Timestamp(value)
+    return None if pd.isna(ts) else ts.date()
+
+# In-memory log plus everything derived from it. Mutations patch the derived
+# views by delta instead of rebuilding them from the full log.
+class LogModel:
+    def __init__(self, df):
+        self.version = 0
+        self.replace(df)
+
+    # Full rebuild (startup, bulk re-map, clear)
+    def replace(self, df):
+        self.df = df.reindex(columns=LOG_COLUMNS).reset_index(drop=True)
+        self.df["BasketID"] = self.df["BasketID"].astype(object)
+        self.shop_index = NameIndex.from_series(self.df["Shop"])
+        self.item_index = NameIndex.from_series(self.df["Item"])
+        self.price_index = PriceHistory.from_df(self.df)
+        self.time_index = TimeIndex.from_df(self.df)
+        self.range_totals = RangeTotals(self.df)
+        self.month_spend = MonthSpend(self.df)
+        self.labels = build_labels(self.df)
+        self.rollup = {}
+        dates = pd.DatetimeIndex(self.time_index.times).date
+        totals = self.df[ROLLUP_COLUMNS].astype(float).assign(Date=dates, Shop=self.df["Shop"], n=1)
+        grouped = totals.dropna(subset=["Date"]).groupby(["Date", "Shop"])[ROLLUP_COLUMNS + ["n"]].sum()
+        for key, values in zip(grouped.index, grouped.to_numpy().tolist()):
+            self.rollup[key] = values
+        self._bump()
+
+    def _bump(self):
+        self.version += 1
+        self._rollup_frame = None
+        self._rolling = None
+        self._forecast = None
+
+    def _roll(self, row, sign):
+        date = to_date(row["DateTime"])
+        if date is None:
+            return
+        key = (date, row["Shop"])
+        values = self.rollup.setdefault(key, [0.0, 0.0, 0.0, 0])
+        for i, col in enumerate(ROLLUP_COLUMNS):
+            values[i] += sign * (0.0 if pd.isna(row[col]) else float(row[col]))
+        values[3] += sign
+        if values[3] <= 0:
+            del self.rollup[key]
+
+    def _index_row(self, row, sign):
+        for index, col in ((self.shop_index, "Shop"), (self.item_index, "Item")):
+            (index.add if sign > 0 else index.remove)(row[col])
+        (self.price_index.add_row if sign > 0 else self.price_index.remove_row)(row)
+        self.month_spend.add_row(row, sign)
+        self._roll(row, sign)
+
+    def insert(self, entry):
+        return self.insert_many([entry])[0]
+
+    # Append a batch with one concat; indexes are patched row by row
+    def insert_many(self, entries):
+        start = len(self.df)
+        rows = pd.DataFrame(entries, columns=LOG_COLUMNS, index=range(start, start + len(entries)))
+        self.df = pd.concat([self.df, rows]) if len(self.df) else rows
+        self.labels = pd.concat([self.labels, build_labels(rows)])
+        self.time_index.extend(rows["DateTime"].tolist())
+        self.range_totals.add_rows(rows)
+        for entry in entries:
+            self._index_row(entry, +1)
+        self._bump()
+        return list(rows.index)
+
+    def update(self, idx, entry):
+        # A log read from an all-integer CSV has int64 price columns; pandas 3
+        # refuses a lossy assignment like 7.5 into them, so widen them first
+        ints = [col for col in PRICE_COLUMNS if self.df[col].dtype.kind in "iu"]
+        if ints:
+            self.df[ints] = self.df[ints].astype(float)
+        old = self.df.loc[idx].copy()
+        self.df.loc[idx, LOG_COLUMNS] = [entry.get(col) for col in LOG_COLUMNS]
+        new = self.df.loc[idx]
+        self.labels.loc[idx] = build_labels(self.df.loc[[idx]]).iloc[0]
+        if str(old["DateTime"]) != str(new["DateTime"]):
+            self.time_index = TimeIndex.from_df(self.df)
+        self._index_row(old, -1)
+        self._index_row(new, +1)
+        self.range_totals.remove_row(old)
+        self.range_totals.add_rows(self.df.loc[[idx]])
+        self._bump()
+
+    def delete_last(self):
+        old = self.df.iloc[-1].copy()
+        self.df = self.df.iloc[:-1]
+        self.labels = self.labels.iloc[:-1]
+        self.time_index.drop_last()
+        self.range_totals.remove_row(old)
+        self._index_row(old, -1)
+        self._bump()
+
+    def clear(self):
+        self.replace(self.df.iloc[0:0])
+
+    # Daily totals per shop for dates in [start, end), straight from the rollup
+    def summary(self, start=None, end=None):
+        if self._rollup_frame is None:
+            rows = [(date, shop, *values[:3]) for (date, shop), values in self.rollup.items()]
+            frame = pd.DataFrame(rows, columns=["Date", "Shop"] + ROLLUP_COLUMNS)
+            frame[ROLLUP_COLUMNS] = frame[ROLLUP_COLUMNS].round(2)
+            self._rollup_frame = frame.sort_values(["Date", "Shop"], ignore_index=True)
+        frame = self._rollup_frame
+        if start is not None:
+            frame = frame[frame["Date"] >= start.date()]
+        if end is not None:
+            frame = frame[frame["Date"] < end.date()]
+        return frame
+
+    # Rolling-window view of the rollup, cached until the next change (or day)
+    def rolling(self):
+        today = date.today()
+        if self._rolling is None or self._rolling[0] != today:
+            self._rolling = (today, RollingView(self.rollup, end=today))
+        return self._rolling[1]
+
+    # Spend forecast from the rollup, cached like rolling()
+    def forecast(self):
+        today = date.today()
+        if self._forecast is None or self._forecast[0] != today:
+            self._forecast = (today, forecast_spend(self.rollup, today))
+        return self._forecast[1]
+
+# One LogModel per process, shared by every session. Cold loads go through
+# the chosen backend (default: $EXP_BACKEND, else pandas). Writes go through a
+# single lock, persist to disk and bump the version; readers take the same
+# lock (read()) so they never see a model halfway through a change.
+class LogStore:
+    def __init__(self, path=LOG_FILE, sidecar=True, backend=None):
+        self.path = path
+        self.sidecar = sidecar
+        self.backend = get_backend(backend)
+        self.lock = threading.RLock()
+        self.version = 0
+        self.model = None
+        self.archived = 0            # leading model rows that live in archive segments
+        self.file_key = None
+        self.file_locks = 0          # nesting depth of our hold on the OS file lock
+        with self.file_lock():
+            upgrade_log(self.path)
+        self.refresh()
+
+    # OS lock on <log>.lock, so a store in another process (the API, the CLI)
+    # can't write between our reload and our save. Taken under self.lock;
+    # nested uses reuse the outer hold.
+    @contextmanager
+    def file_lock(self, shared=False):
+        if fcntl is None or self.file_locks:
+            self.file_locks += 1
+            try:
+                yield
+            finally:
+                self.file_locks -= 1
+            return
+        with open(self.path + ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            self.file_locks += 1
+            try:
+                yield
+            finally:
+                self.file_locks -= 1
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _file_key(self):
+        files = [self.path, os.path.join(archive_dir(self.path), "manifest.json")]
+        stats = [os.stat(file) if os.path.exists(file) else None for file in files]
+        return tuple((stat.st_mtime_ns, stat.st_size) if stat else None for stat in stats)
+
+    # Reload if the file changed behind our back (another process, manual edit)
+    def refresh(self):
+        key = self._file_key()
+        if self.model is not None and key == self.file_key:
+            return False
+        with self.lock, self.file_lock(shared=True):
+            key = self._file_key()
+            if self.model is not None and key == self.file_key:
+                return False
+            init_log(self.path)
+            self.model = LogModel(self.backend.read(self.path))
+            self.archived = archived_rows(self.path)
+            self.file_key = self._file_key()
+            self._changed("reload")
+        return True
+
+    # Up-to-date model, held still for the duration of the block
+    @contextmanager
+    def read(self):
+        with self.lock:
+            self.refresh()
+            yield self.model
+
+    def _changed(self, action):
+        self.version += 1
+
+    # Months of archived rows among `idxs`
+    def _archived_months(self, idxs):
+        idxs = [idx for idx in idxs if idx < self.archived]
+        return set(month_keys(self.model.df.loc[idxs])) if idxs else set()
+
+    # Apply a change to the model and persist it; returns bytes written.
+    # `archive` names the archive months to rewrite (None: every month).
+    def _write(self, action, apply, appended=None, archive=()):
+        with self.lock, self.file_lock():
+            self.refresh()
+            if callable(archive):
+                archive = archive()
+            result = apply(self.model)
+            before = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            # Only a sidecar that matched the CSV before this append can be appended to
+            base = self._sidecar_base() if self.sidecar and appended is not None else None
+            if appended is not None:
+                append_log(appended, self.path)
+            else:
+                if self.archived and (archive is None or archive):
+                    write_segments(self.path, self.model.df.iloc[:self.archived], archive)
+                    self.archived = min(self.archived, len(self.model.df))
+                save_log(self.model.df.iloc[self.archived:], self.path)
+            after = os.path.getsize(self.path)
+            if self.sidecar:
+                self._write_sidecar(appended, base)
+            self.file_key = self._file_key()
+            self._changed(action)
+        return result, (after - before if appended is not None else after)
+
+    # Rows in the sidecar if it is fresh against the CSV as it is now, else None
+    def _sidecar_base(self):
+        meta = read_meta(self.path)
+        if meta is None or not os.path.exists(self.path) or meta["source"] != source_key(self.path):
+            return None
+        return meta["rows"]
+
+    # Keep the memory-mappable numeric columns in step with the CSV: append
+    # when the sidecar held exactly the rows before this append, else rebuild.
+    # The store never maps it itself: the model needs the text columns too and
+    # stays in memory; the sidecar serves cold readers (exp_cli totals, exp_query).
+    def _write_sidecar(self, appended, base=None):
+        expected = len(self.model.df) - len(appended) if appended is not None else None
+        if base is None or base != expected or not write_columns(appended, self.path, append=True):
+            write_columns(self.model.df, self.path)
+
+    def insert(self, entry):
+        indexes, written = self.insert_many([entry])
+        return indexes[0], written
+
+    def insert_many(self, entries):
+        return self._write(
+            "insert", lambda model: model.insert_many(entries),
+            appended=pd.DataFrame(entries, columns=LOG_COLUMNS),
+        )
+
+    # Editing an archived row rewrites its old and new month segments
+    def update(self, idx, entry):
+        def months():
+            if idx >= self.archived:
+                return set()
+            return self._archived_months([idx]) | set(month_keys(pd.DataFrame([entry])))
+        return self._write("update", lambda model: model.update(idx, entry), archive=months)
+
+    def delete_last(self):
+        return self._write(
+            "delete", lambda model: model.delete_last(),
+            archive=lambda: self._archived_months([len(self.model.df) - 1]),
+        )
+
+    def clear(self):
+        return self._write("clear", lambda model: model.clear(), archive=None)
+
+    def replace(self, df):
+        return self._write("replace", lambda model: model.replace(df), archive=None)
+
+    # Re-map Shop/Item to canonical names. The mapping runs on the model as
+    # reloaded under the file lock, so rows another process appended in the
+    # meantime are re-mapped too instead of being overwritten. Returns
+    # (values changed, bytes written); nothing is written when nothing changes.
+    def remap(self, aliases, merge_case=True):
+        with self.lock, self.file_lock():
+            self.refresh()
+            df, changed = canonicalize(self.model.df, aliases, merge_case)
+            if not changed:
+                return 0, 0
+            _, written = self._write("remap", lambda model: model.replace(df), archive=None)
+        return changed, written
+
+    # Roll months before the last `keep_months` into compressed segments
+    def archive(self, keep_months=KEEP_MONTHS, codec=None):
+        with self.lock, self.file_lock():
+            self.refresh()
+            moved = archive_log(self.path, keep_months, codec)
+            if moved:
+                self.refresh()
+        return moved
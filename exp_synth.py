@@ -0,0 +1,67 @@
+import argparse
+import numpy as np
+import pandas as pd
+from exp_core import LOG_COLUMNS, save_log
+
+# Seeded synthetic purchase log with the same columns as log.csv.
+# Shop/item popularity is Zipf-like so distinct-value and groupby sizes look realistic.
+def generate_log(rows=10_000, shops=20, items=500, days=365, discount_mix=0.3,
+                 seed=0, start="2020-01-01"):
+    rng = np.random.default_rng(seed)
+
+    def zipf_choice(n):
+        weights = 1.0 / np.arange(1, n + 1)
+        return rng.choice(n, size=rows, p=weights / weights.sum())
+
+    shop_names = np.array([f"Shop {i:03d}" for i in range(shops)], dtype=object)
+    item_names = np.array([f"Item {i:05d}" for i in range(items)], dtype=object)
+    item_base = np.round(rng.lognormal(mean=3.5, sigma=0.8, size=items), 2) + 1
+
+    seconds = np.sort(rng.integers(0, days * 86400, size=rows))
+    times = (pd.Timestamp(start) + pd.to_timedelta(seconds, unit="s")).strftime("%Y-%m-%d %H:%M:%S")
+
+    item_idx = zipf_choice(items)
+    qty = rng.geometric(0.6, size=rows).clip(max=12)
+    normal = np.round(item_base[item_idx] * rng.uniform(0.9, 1.1, size=rows), 2)
+    discounted = rng.random(rows) < discount_mix
+    pct = np.where(discounted, rng.integers(5, 51, size=rows), 0).astype(float)
+    purchase = np.round(normal * (1 - pct / 100), 2)
+    amount = np.round(normal - purchase, 2)
+
+    df = pd.DataFrame({
+        "DateTime": np.asarray(times, dtype=object),
+        "Shop": shop_names[zipf_choice(shops)],
+        "Item": item_names[item_idx],
+        "Qty": qty,
+        "NormalPrice": normal,
+        "PurchasePrice": purchase,
+        "DiscountAmt": amount,
+        "DiscountPct": pct,
+        "TotalNormal": np.round(normal * qty, 2),
+        "TotalPurchase": np.round(purchase * qty, 2),
+        "TotalDiscount": np.round(amount * qty, 2),
+        "BasketID": None,
+    })
+    return df[LOG_COLUMNS]
+
+# "10k" -> 10000, "1M" -> 1000000
+def parse_count(text):
+    text = str(text).strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic expense log")
+    parser.add_argument("--rows", default="10k")
+    parser.add_argument("--shops", type=int, default=20)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--discount-mix", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", default="2020-01-01")
+    parser.add_argument("--out", default="synthetic_log.csv")
+    args = parser.parse_args()
+    df = generate_log(parse_count(args.rows), args.shops, args.items, args.days,
+                      args.discount_mix, args.seed, args.start)
+    save_log(df, args.out)
+    print(f"Wrote {len(df)} rows to {args.out}")
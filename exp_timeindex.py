@@ -0,0 +1,205 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+PERIODS = ["All", "Today", "Last 7 days", "Last 30 days", "This month", "Last month", "This year"]
+
+def to_datetime64(values):
+    return pd.to_datetime(pd.Series(values, dtype=object), errors="coerce").to_numpy("datetime64[ns]")
+
+# Sorted datetime64 index over the log's DateTime column. The log is append-mostly,
+# so row order is usually already time order; otherwise a sorted permutation is kept.
+class TimeIndex:
+    def __init__(self, times):
+        self.times = times                      # datetime64 in row order
+        self.order = None                       # None -> rows already sorted
+        self._sort()
+
+    @classmethod
+    def from_df(cls, df):
+        return cls(to_datetime64(df["DateTime"]))
+
+    def _sort(self):
+        t = self.times
+        if len(t) > 1 and (np.isnat(t).any() or (t[1:] < t[:-1]).any()):
+            self.order = np.argsort(t, kind="stable")   # NaT sorts last
+            self.sorted = t[self.order]
+        else:
+            self.order = None
+            self.sorted = t
+
+    def __len__(self):
+        return len(self.times)
+
+    # Row positions with start <= DateTime < end, in time order
+    def positions(self, start=None, end=None):
+        lo = 0 if start is None else np.searchsorted(self.sorted, np.datetime64(start, "ns"), "left")
+        hi = np.searchsorted(self.sorted, np.datetime64("NaT", "ns"), "left") if end is None \
+            else np.searchsorted(self.sorted, np.datetime64(end, "ns"), "left")
+        return slice(int(lo), int(hi)) if self.order is None else self.order[lo:hi]
+
+    def extend(self, dts):
+        values = to_datetime64(dts)
+        if not len(values):
+            return
+        in_order = (
+            self.order is None
+            and not np.isnat(values).any()
+            and (values[1:] >= values[:-1]).all()
+            and (not len(self.sorted) or values[0] >= self.sorted[-1])
+        )
+        self.times = np.concatenate([self.times, values])
+        if in_order:
+            self.sorted = self.times
+        else:
+            self._sort()
+
+    def drop_last(self):
+        self.times = self.times[:-1]
+        if self.order is None:
+            self.sorted = self.times
+        else:
+            self._sort()
+
+TOTAL_COLUMNS = ["TotalNormal", "TotalPurchase", "TotalDiscount"]
+
+def to_cents(values):
+    return np.rint(np.nan_to_num(np.asarray(values, dtype=float)) * 100).astype(np.int64)
+
+# Cumulative sums (in integer cents, so differences are exact) of the total
+# columns over rows in time order. A range total is two searchsorted calls
+# and one subtraction. Buffers grow geometrically, so in-order appends are
+# amortized O(1); out-of-order changes rebuild this one series.
+class PrefixSums:
+    def __init__(self, times, cents):
+        order = np.argsort(times, kind="stable")
+        self._set(times[order], cents[order])
+
+    def _set(self, times, cents):
+        n = len(times)
+        cap = n + n // 4 + 16
+        self.times = np.empty(cap, dtype="datetime64[ns]")
+        self.times[:n] = times
+        self.cums = np.zeros((cap + 1, len(TOTAL_COLUMNS)), dtype=np.int64)
+        np.cumsum(cents, axis=0, out=self.cums[1:n + 1])
+        self.n = n
+
+    def _rows(self):
+        return self.times[:self.n], np.diff(self.cums[:self.n + 1], axis=0)
+
+    def __len__(self):
+        return self.n
+
+    # times: datetime64 (no NaT), cents: (k, 3) int64
+    def extend(self, times, cents):
+        k = len(times)
+        if not k:
+            return
+        if self.n and (times[0] < self.times[self.n - 1] or (times[1:] < times[:-1]).any()):
+            old_times, old_cents = self._rows()
+            merged = np.concatenate([old_times, times])
+            order = np.argsort(merged, kind="stable")
+            self._set(merged[order], np.concatenate([old_cents, cents])[order])
+            return
+        if self.n + k > len(self.times):
+            cap = (self.n + k) * 3 // 2 + 16
+            self.times = np.concatenate([self.times[:self.n], np.empty(cap - self.n, dtype="datetime64[ns]")])
+            self.cums = np.concatenate([self.cums[:self.n + 1], np.zeros((cap - self.n, self.cums.shape[1]), np.int64)])
+        self.times[self.n:self.n + k] = times
+        self.cums[self.n + 1:self.n + k + 1] = self.cums[self.n] + np.cumsum(cents, axis=0)
+        self.n += k
+
+    def remove(self, time, cents):
+        lo = np.searchsorted(self.times[:self.n], time, "left")
+        hi = np.searchsorted(self.times[:self.n], time, "right")
+        rows = np.diff(self.cums[lo:hi + 1], axis=0)
+        matches = np.flatnonzero((rows == cents).all(axis=1))
+        if not len(matches):
+            return
+        pos = lo + matches[-1]
+        if pos == self.n - 1:
+            self.n -= 1
+            return
+        times, all_cents = self._rows()
+        self._set(np.delete(times, pos), np.delete(all_cents, pos, axis=0))
+
+    # Totals and entry count for start <= DateTime < end
+    def total(self, start=None, end=None):
+        times = self.times[:self.n]
+        lo = 0 if start is None else int(np.searchsorted(times, np.datetime64(pd.Timestamp(start), "ns"), "left"))
+        hi = self.n if end is None else int(np.searchsorted(times, np.datetime64(pd.Timestamp(end), "ns"), "left"))
+        hi = max(hi, lo)
+        sums = self.cums[hi] - self.cums[lo]
+        return {col: int(sums[i]) / 100 for i, col in enumerate(TOTAL_COLUMNS)} | {"Entries": hi - lo}
+
+# Prefix sums over the whole log and per shop; rows without a valid
+# DateTime are left out
+class RangeTotals:
+    def __init__(self, df):
+        times = to_datetime64(df["DateTime"])
+        cents = to_cents(df[TOTAL_COLUMNS])
+        valid = ~np.isnat(times)
+        self.all = PrefixSums(times[valid], cents[valid])
+        shops = df["Shop"].astype(str).to_numpy()[valid]
+        times, cents = times[valid], cents[valid]
+        self.shops = {
+            shop: PrefixSums(times[idx], cents[idx])
+            for shop, idx in pd.Series(shops).groupby(shops).indices.items()
+        }
+
+    # Rows appended to the log (usually in time order: the O(1) path)
+    def add_rows(self, df):
+        times = to_datetime64(df["DateTime"])
+        valid = ~np.isnat(times)
+        times, cents = times[valid], to_cents(df[TOTAL_COLUMNS])[valid]
+        shops = df["Shop"].astype(str).to_numpy()[valid]
+        order = np.argsort(times, kind="stable")
+        self.all.extend(times[order], cents[order])
+        for shop in np.unique(shops):
+            idx = np.flatnonzero(shops == shop)
+            if shop not in self.shops:
+                self.shops[shop] = PrefixSums(times[:0], cents[:0])
+            self.shops[shop].extend(times[idx], cents[idx])
+
+    def remove_row(self, row):
+        time = to_datetime64([row["DateTime"]])[0]
+        if np.isnat(time):
+            return
+        cents = to_cents([[row[col] for col in TOTAL_COLUMNS]])[0]
+        shop = str(row["Shop"])
+        self.all.remove(time, cents)
+        if shop in self.shops:
+            self.shops[shop].remove(time, cents)
+            if not len(self.shops[shop]):
+                del self.shops[shop]
+
+    def total(self, start=None, end=None, shop=None):
+        series = self.all if shop is None else self.shops.get(shop)
+        if series is None:
+            return {col: 0.0 for col in TOTAL_COLUMNS} | {"Entries": 0}
+        return series.total(start, end)
+
+    # One row per shop with entries in the range
+    def by_shop(self, start=None, end=None):
+        rows = [{"Shop": shop, **series.total(start, end)} for shop, series in sorted(self.shops.items())]
+        df = pd.DataFrame(rows, columns=["Shop"] + TOTAL_COLUMNS + ["Entries"])
+        return df[df["Entries"] > 0].reset_index(drop=True)
+
+# Half-open [start, end) bounds for a named period
+def period_bounds(period, now=None):
+    now = now or datetime.now()
+    today = datetime(now.year, now.month, now.day)
+    if period == "Today":
+        return today, today + timedelta(days=1)
+    if period == "Last 7 days":
+        return today - timedelta(days=6), today + timedelta(days=1)
+    if period == "Last 30 days":
+        return today - timedelta(days=29), today + timedelta(days=1)
+    if period == "This month":
+        return today.replace(day=1), None
+    if period == "Last month":
+        first = today.replace(day=1)
+        return (first - timedelta(days=1)).replace(day=1), first
+    if period == "This year":
+        return today.replace(month=1, day=1), None
+    return None, None